@@ -3,6 +3,11 @@
 Revision ID: 0005
 Revises: 0004
 Create Date: 2026-02-23 00:00:00.000000
+
+Note: dropping ``amount`` forces SQLite to rebuild the whole transactions
+table.  The columns added by 0006–0008 are folded into that same rebuild so a
+legacy DB walking 0004 → 0008 copies the table once; those revisions skip
+columns that already exist.
 """
 
 from typing import Sequence, Union
@@ -15,27 +20,90 @@ down_revision: Union[str, None] = "0004"
 branch_labels: Union[str, Sequence[str], None] = None
 depends_on: Union[str, Sequence[str], None] = None
 
+# Rows per backfill UPDATE.  Each batch commits on its own so the SQLite write
+# lock is released between batches, the WAL stays small, and an interrupted
+# migration resumes where it stopped: the added column has been committed by
+# then, so it is only added when missing, and already-filled rows are skipped.
+_BATCH_SIZE = 10_000
+
+
+def _transaction_columns(bind) -> set[str]:
+    return {c["name"] for c in sa.inspect(bind).get_columns("transactions")}
+
+
+def _max_transaction_id(bind) -> int:
+    return bind.execute(sa.text("SELECT MAX(id) FROM transactions")).scalar() or 0
+
+
+def _cents_expr(bind) -> str:
+    # SQLite: format the REAL to two decimals and strip the point, so the cents
+    # come from printf's decimal rounding rather than ROUND(amount * 100), which
+    # double-rounds in FP64 (1.005 * 100 == 100.49999… → 100).
+    if bind.dialect.name == "sqlite":
+        return "CAST(REPLACE(printf('%.2f', amount), '.', '') AS INTEGER)"
+    return "CAST(ROUND(amount * 100) AS INTEGER)"
+
 
 def upgrade() -> None:
     # 1. Add nullable column first (NOT NULL would fail on existing rows)
-    with op.batch_alter_table("transactions", schema=None) as batch_op:
-        batch_op.add_column(sa.Column("amount_cents", sa.Integer(), nullable=True))
+    bind = op.get_bind()
+    if "amount_cents" not in _transaction_columns(bind):
+        with op.batch_alter_table("transactions", schema=None) as batch_op:
+            batch_op.add_column(sa.Column("amount_cents", sa.Integer(), nullable=True))
 
-    # 2. Populate from existing float data
-    op.execute(
-        "UPDATE transactions SET amount_cents = CAST(ROUND(amount * 100) AS INTEGER)"
-    )
+    # 2. Populate from existing float data, in id-range batches
+    max_id = _max_transaction_id(bind)
+    cents = _cents_expr(bind)
+    with op.get_context().autocommit_block():
+        for lo in range(1, max_id + 1, _BATCH_SIZE):
+            bind.execute(
+                sa.text(
+                    f"UPDATE transactions SET amount_cents = {cents} "
+                    "WHERE id BETWEEN :lo AND :hi AND amount_cents IS NULL"
+                ),
+                {"lo": lo, "hi": lo + _BATCH_SIZE - 1},
+            )
 
-    # 3. Enforce NOT NULL, drop the float column
+    # 3. Enforce NOT NULL, drop the float column, and add the 0006–0008
+    #    columns in the same table rebuild
+    existing = _transaction_columns(bind)
     with op.batch_alter_table("transactions", schema=None) as batch_op:
         batch_op.alter_column("amount_cents", existing_type=sa.Integer(), nullable=False)
         batch_op.drop_column("amount")
+        if "transaction_type" not in existing:
+            batch_op.add_column(
+                sa.Column("transaction_type", sa.String(20), nullable=False, server_default="normal")
+            )
+        if "category_source" not in existing:
+            batch_op.add_column(
+                sa.Column(
+                    "category_source",
+                    sa.String(20),
+                    nullable=False,
+                    server_default="uncategorized",
+                )
+            )
+        if "category_rule_id" not in existing:
+            batch_op.add_column(sa.Column("category_rule_id", sa.Integer(), nullable=True))
+        if "merchant_canonical" not in existing:
+            batch_op.add_column(sa.Column("merchant_canonical", sa.String(255), nullable=True))
 
 
 def downgrade() -> None:
-    with op.batch_alter_table("transactions", schema=None) as batch_op:
-        batch_op.add_column(sa.Column("amount", sa.Float(), nullable=True))
-    op.execute("UPDATE transactions SET amount = amount_cents / 100.0")
+    bind = op.get_bind()
+    if "amount" not in _transaction_columns(bind):
+        with op.batch_alter_table("transactions", schema=None) as batch_op:
+            batch_op.add_column(sa.Column("amount", sa.Float(), nullable=True))
+    max_id = _max_transaction_id(bind)
+    with op.get_context().autocommit_block():
+        for lo in range(1, max_id + 1, _BATCH_SIZE):
+            bind.execute(
+                sa.text(
+                    "UPDATE transactions SET amount = amount_cents / 100.0 "
+                    "WHERE id BETWEEN :lo AND :hi AND amount IS NULL"
+                ),
+                {"lo": lo, "hi": lo + _BATCH_SIZE - 1},
+            )
     with op.batch_alter_table("transactions", schema=None) as batch_op:
         batch_op.alter_column("amount", existing_type=sa.Float(), nullable=False)
         batch_op.drop_column("amount_cents")
@@ -17,6 +17,10 @@ depends_on: Union[str, Sequence[str], None] = None
 
 
 def upgrade() -> None:
+    # Already present when 0005 folded it into its table rebuild.
+    existing = {c["name"] for c in sa.inspect(op.get_bind()).get_columns("transactions")}
+    if "transaction_type" in existing:
+        return
     with op.batch_alter_table("transactions", schema=None) as batch_op:
         batch_op.add_column(
             sa.Column("transaction_type", sa.String(20), nullable=False, server_default="normal")
@@ -17,9 +17,15 @@ depends_on: Union[str, Sequence[str], None] = None
 
 
 def upgrade() -> None:
+    # Either column may already exist when 0005 folded it into its table rebuild.
+    existing = {c["name"] for c in sa.inspect(op.get_bind()).get_columns("transactions")}
+    if {"category_source", "category_rule_id"} <= existing:
+        return
     with op.batch_alter_table("transactions", schema=None) as batch_op:
-        batch_op.add_column(sa.Column("category_source", sa.String(20), nullable=True))
-        batch_op.add_column(sa.Column("category_rule_id", sa.Integer(), nullable=True))
+        if "category_source" not in existing:
+            batch_op.add_column(sa.Column("category_source", sa.String(20), nullable=True))
+        if "category_rule_id" not in existing:
+            batch_op.add_column(sa.Column("category_rule_id", sa.Integer(), nullable=True))
 
 
 def downgrade() -> None:
@@ -22,37 +22,71 @@ down_revision: Union[str, None] = "0007"
 branch_labels: Union[str, Sequence[str], None] = None
 depends_on: Union[str, Sequence[str], None] = None
 
+# Rows per backfill UPDATE (see 0005 for the rationale).
+_BATCH_SIZE = 10_000
+
+_INDEXES = [
+    ("idx_transactions_posted_date", "posted_date"),
+    ("idx_transactions_category_id", "category_id"),
+    ("idx_transactions_merchant_canonical", "merchant_canonical"),
+]
+
 
 def upgrade() -> None:
+    # Columns folded into 0005's table rebuild already exist, and
+    # category_source is then already NOT NULL — skip those steps.
+    columns = {c["name"]: c for c in sa.inspect(op.get_bind()).get_columns("transactions")}
+
     # 1. Add merchant_canonical (nullable — canonicalization deferred to Pass 3)
-    with op.batch_alter_table("transactions", schema=None) as batch_op:
-        batch_op.add_column(sa.Column("merchant_canonical", sa.String(255), nullable=True))
+    if "merchant_canonical" not in columns:
+        with op.batch_alter_table("transactions", schema=None) as batch_op:
+            batch_op.add_column(sa.Column("merchant_canonical", sa.String(255), nullable=True))
 
-    # 2. Backfill NULLs in category_source before tightening the constraint
+    # 2. Backfill NULLs in category_source before tightening the constraint.
+    #    A temporary partial index lets each batch seek straight to the
+    #    remaining NULL rows instead of scanning the whole id range.
+    bind = op.get_bind()
+    max_id = bind.execute(sa.text("SELECT MAX(id) FROM transactions")).scalar() or 0
     op.execute(
-        "UPDATE transactions SET category_source = 'uncategorized' WHERE category_source IS NULL"
+        "CREATE INDEX IF NOT EXISTS tmp_cs_null ON transactions(id) WHERE category_source IS NULL"
     )
+    with op.get_context().autocommit_block():
+        for lo in range(1, max_id + 1, _BATCH_SIZE):
+            bind.execute(
+                sa.text(
+                    "UPDATE transactions SET category_source = :source "
+                    "WHERE id BETWEEN :lo AND :hi AND category_source IS NULL"
+                ),
+                {"source": "uncategorized", "lo": lo, "hi": lo + _BATCH_SIZE - 1},
+            )
+    op.execute("DROP INDEX IF EXISTS tmp_cs_null")
 
     # 3. Make category_source NOT NULL with a SQL-level default
     #    batch_alter_table recreates the table for SQLite, picking up the new constraint.
-    with op.batch_alter_table("transactions", schema=None) as batch_op:
-        batch_op.alter_column(
-            "category_source",
-            existing_type=sa.String(20),
-            nullable=False,
-            server_default="'uncategorized'",
-        )
+    if columns["category_source"]["nullable"]:
+        with op.batch_alter_table("transactions", schema=None) as batch_op:
+            batch_op.alter_column(
+                "category_source",
+                existing_type=sa.String(20),
+                nullable=False,
+                server_default="'uncategorized'",
+            )
 
-    # 4. Performance / provenance indexes
-    op.create_index("idx_transactions_posted_date", "transactions", ["posted_date"])
-    op.create_index("idx_transactions_category_id", "transactions", ["category_id"])
-    op.create_index("idx_transactions_merchant_canonical", "transactions", ["merchant_canonical"])
+    # 4. Performance / provenance indexes — created last so the table rebuild
+    #    in step 3 copies rows into an unindexed table.  Postgres builds them
+    #    CONCURRENTLY, which must run outside the migration transaction.
+    if op.get_bind().dialect.name == "postgresql":
+        with op.get_context().autocommit_block():
+            for name, column in _INDEXES:
+                op.create_index(name, "transactions", [column], postgresql_concurrently=True)
+    else:
+        for name, column in _INDEXES:
+            op.create_index(name, "transactions", [column])
 
 
 def downgrade() -> None:
-    op.drop_index("idx_transactions_merchant_canonical", table_name="transactions")
-    op.drop_index("idx_transactions_category_id", table_name="transactions")
-    op.drop_index("idx_transactions_posted_date", table_name="transactions")
+    for name, _column in reversed(_INDEXES):
+        op.drop_index(name, table_name="transactions")
 
     with op.batch_alter_table("transactions", schema=None) as batch_op:
         batch_op.alter_column(
@@ -0,0 +1,56 @@
+"""Add model columns that never had a migration
+
+Revision ID: 0011
+Revises: 0010
+Create Date: 2026-10-16 00:00:00.000000
+
+Changes:
+  - transactions.note          TEXT nullable
+  - categories.monthly_budget  INTEGER nullable (cents)
+  - categories.tax_deductible  BOOLEAN NOT NULL DEFAULT false
+  - imports.notes              TEXT nullable
+
+These columns were added to the models without a matching revision, so only
+DBs bootstrapped via create_all have them.  Each table is introspected once
+and only the columns it is genuinely missing are added.
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+revision: str = "0011"
+down_revision: Union[str, None] = "0010"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _columns() -> dict[str, list[sa.Column]]:
+    return {
+        "transactions": [sa.Column("note", sa.Text(), nullable=True)],
+        "categories": [
+            sa.Column("monthly_budget", sa.Integer(), nullable=True),
+            sa.Column("tax_deductible", sa.Boolean(), nullable=False, server_default=sa.false()),
+        ],
+        "imports": [sa.Column("notes", sa.Text(), nullable=True)],
+    }
+
+
+def upgrade() -> None:
+    insp = sa.inspect(op.get_bind())
+    for table, columns in _columns().items():
+        existing = {c["name"] for c in insp.get_columns(table)}
+        missing = [c for c in columns if c.name not in existing]
+        if not missing:
+            continue
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            for column in missing:
+                batch_op.add_column(column)
+
+
+def downgrade() -> None:
+    for table, columns in _columns().items():
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            for column in reversed(columns):
+                batch_op.drop_column(column.name)
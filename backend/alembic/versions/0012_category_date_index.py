@@ -0,0 +1,42 @@
+"""Composite (category_id, posted_date) index on transactions
+
+Revision ID: 0012
+Revises: 0011
+Create Date: 2026-10-16 00:00:00.000000
+
+Changes:
+  - New index idx_tx_cat_date (category_id, posted_date), replacing
+    idx_transactions_category_id.  Category-in-date-range queries become one
+    index seek + range scan already in date order.
+  - idx_transactions_posted_date and idx_transactions_merchant_canonical are
+    kept (date-range filters across all categories, merchant lookups) and
+    created if missing — DBs bootstrapped via create_all never got them.
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+revision: str = "0012"
+down_revision: Union[str, None] = "0011"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+_INDEXES = [
+    ("idx_transactions_posted_date", ["posted_date"]),
+    ("idx_transactions_merchant_canonical", ["merchant_canonical"]),
+    ("idx_tx_cat_date", ["category_id", "posted_date"]),
+]
+
+
+def upgrade() -> None:
+    for name, columns in _INDEXES:
+        op.create_index(name, "transactions", columns, if_not_exists=True)
+    op.drop_index("idx_transactions_category_id", table_name="transactions", if_exists=True)
+
+
+def downgrade() -> None:
+    op.create_index(
+        "idx_transactions_category_id", "transactions", ["category_id"], if_not_exists=True
+    )
+    op.drop_index("idx_tx_cat_date", table_name="transactions")
@@ -0,0 +1,30 @@
+"""Index transactions.import_id
+
+Revision ID: 0013
+Revises: 0012
+Create Date: 2026-10-16 00:00:00.000000
+
+Changes:
+  - New index idx_transactions_import_id.  list_imports groups by it and
+    delete_import / patch_import filter on it; without it each of those
+    scans the whole transactions table.
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+revision: str = "0013"
+down_revision: Union[str, None] = "0012"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        "idx_transactions_import_id", "transactions", ["import_id"], if_not_exists=True
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("idx_transactions_import_id", table_name="transactions")
@@ -0,0 +1,39 @@
+"""ON DELETE CASCADE on transactions.import_id
+
+Revision ID: 0014
+Revises: 0013
+Create Date: 2026-10-16 00:00:00.000000
+
+Changes:
+  - transactions.import_id → imports.id now cascades on delete, so deleting
+    an import removes its transactions (and, through transaction_tags'
+    own cascade, their tag links) in the database.
+
+SQLite can't alter a constraint in place; batch mode rebuilds transactions
+once.  The existing FK is unnamed, so a naming convention gives it a name
+batch mode can drop.
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+revision: str = "0014"
+down_revision: Union[str, None] = "0013"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+_FK_NAME = "fk_transactions_import_id_imports"
+_NAMING = {"fk": "fk_%(table_name)s_%(column_0_name)s_%(referred_table_name)s"}
+
+
+def upgrade() -> None:
+    with op.batch_alter_table("transactions", naming_convention=_NAMING) as batch_op:
+        batch_op.drop_constraint(_FK_NAME, type_="foreignkey")
+        batch_op.create_foreign_key(_FK_NAME, "imports", ["import_id"], ["id"], ondelete="CASCADE")
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("transactions", naming_convention=_NAMING) as batch_op:
+        batch_op.drop_constraint(_FK_NAME, type_="foreignkey")
+        batch_op.create_foreign_key(_FK_NAME, "imports", ["import_id"], ["id"])
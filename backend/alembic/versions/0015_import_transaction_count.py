@@ -0,0 +1,76 @@
+"""Denormalized imports.transaction_count
+
+Revision ID: 0015
+Revises: 0014
+Create Date: 2026-10-16 00:00:00.000000
+
+Changes:
+  - imports.transaction_count  INTEGER NOT NULL DEFAULT 0, backfilled from
+    transactions
+  - triggers on transactions (insert / delete / import_id update) that keep
+    the count current
+
+Batch mode does not carry triggers across a table rebuild, so any later
+revision that batch-alters transactions must recreate these.
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+revision: str = "0015"
+down_revision: Union[str, None] = "0014"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Mirrors app.models.TRANSACTION_COUNT_TRIGGERS as of this revision.
+_TRIGGERS = {
+    "trg_transactions_count_insert": """
+        CREATE TRIGGER IF NOT EXISTS trg_transactions_count_insert
+        AFTER INSERT ON transactions
+        BEGIN
+            UPDATE imports SET transaction_count = transaction_count + 1
+            WHERE id = NEW.import_id;
+        END
+    """,
+    "trg_transactions_count_delete": """
+        CREATE TRIGGER IF NOT EXISTS trg_transactions_count_delete
+        AFTER DELETE ON transactions
+        BEGIN
+            UPDATE imports SET transaction_count = transaction_count - 1
+            WHERE id = OLD.import_id;
+        END
+    """,
+    "trg_transactions_count_move": """
+        CREATE TRIGGER IF NOT EXISTS trg_transactions_count_move
+        AFTER UPDATE OF import_id ON transactions
+        WHEN OLD.import_id IS NOT NEW.import_id
+        BEGIN
+            UPDATE imports SET transaction_count = transaction_count - 1
+            WHERE id = OLD.import_id;
+            UPDATE imports SET transaction_count = transaction_count + 1
+            WHERE id = NEW.import_id;
+        END
+    """,
+}
+
+
+def upgrade() -> None:
+    with op.batch_alter_table("imports", schema=None) as batch_op:
+        batch_op.add_column(
+            sa.Column("transaction_count", sa.Integer(), nullable=False, server_default="0")
+        )
+    op.execute(
+        "UPDATE imports SET transaction_count = "
+        "(SELECT COUNT(*) FROM transactions WHERE transactions.import_id = imports.id)"
+    )
+    for ddl in _TRIGGERS.values():
+        op.execute(ddl)
+
+
+def downgrade() -> None:
+    for name in _TRIGGERS:
+        op.execute(f"DROP TRIGGER IF EXISTS {name}")
+    with op.batch_alter_table("imports", schema=None) as batch_op:
+        batch_op.drop_column("transaction_count")
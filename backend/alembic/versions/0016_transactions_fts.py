@@ -0,0 +1,75 @@
+"""Trigram FTS5 index over transaction text
+
+Revision ID: 0016
+Revises: 0015
+Create Date: 2026-10-16 00:00:00.000000
+
+Changes:
+  - transactions_fts: external-content FTS5 table (trigram tokenizer) over
+    transactions.description_raw / description_norm / merchant, built from
+    the existing rows
+  - triggers on transactions (insert / delete / update of those columns)
+    that keep it in sync
+
+The trigram tokenizer needs SQLite 3.34+.  As with 0015, a later batch
+rebuild of transactions must recreate the triggers.
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+revision: str = "0016"
+down_revision: Union[str, None] = "0015"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Mirrors app.models.TRANSACTION_SEARCH_DDL as of this revision.
+_TABLE = """
+    CREATE VIRTUAL TABLE IF NOT EXISTS transactions_fts USING fts5(
+        description_raw, description_norm, merchant,
+        content='transactions', content_rowid='id', tokenize='trigram'
+    )
+"""
+
+_TRIGGERS = {
+    "trg_transactions_fts_insert": """
+        CREATE TRIGGER IF NOT EXISTS trg_transactions_fts_insert
+        AFTER INSERT ON transactions
+        BEGIN
+            INSERT INTO transactions_fts(rowid, description_raw, description_norm, merchant)
+            VALUES (NEW.id, NEW.description_raw, NEW.description_norm, NEW.merchant);
+        END
+    """,
+    "trg_transactions_fts_delete": """
+        CREATE TRIGGER IF NOT EXISTS trg_transactions_fts_delete
+        AFTER DELETE ON transactions
+        BEGIN
+            INSERT INTO transactions_fts(transactions_fts, rowid, description_raw, description_norm, merchant)
+            VALUES ('delete', OLD.id, OLD.description_raw, OLD.description_norm, OLD.merchant);
+        END
+    """,
+    "trg_transactions_fts_update": """
+        CREATE TRIGGER IF NOT EXISTS trg_transactions_fts_update
+        AFTER UPDATE OF description_raw, description_norm, merchant ON transactions
+        BEGIN
+            INSERT INTO transactions_fts(transactions_fts, rowid, description_raw, description_norm, merchant)
+            VALUES ('delete', OLD.id, OLD.description_raw, OLD.description_norm, OLD.merchant);
+            INSERT INTO transactions_fts(rowid, description_raw, description_norm, merchant)
+            VALUES (NEW.id, NEW.description_raw, NEW.description_norm, NEW.merchant);
+        END
+    """,
+}
+
+
+def upgrade() -> None:
+    op.execute(_TABLE)
+    op.execute("INSERT INTO transactions_fts(transactions_fts) VALUES ('rebuild')")
+    for ddl in _TRIGGERS.values():
+        op.execute(ddl)
+
+
+def downgrade() -> None:
+    for name in _TRIGGERS:
+        op.execute(f"DROP TRIGGER IF EXISTS {name}")
+    op.execute("DROP TABLE IF EXISTS transactions_fts")
@@ -0,0 +1,45 @@
+"""Report-path indexes on transactions
+
+Revision ID: 0017
+Revises: 0016
+Create Date: 2026-10-16 00:00:00.000000
+
+Changes:
+  - New index idx_tx_date_type (posted_date, transaction_type).  Date-range
+    report queries that exclude transfers filter on the index entries
+    without visiting the table row first.
+  - New index idx_transactions_category_rule_id, for delete_rule's
+    provenance reset and the rules FK.
+
+idx_transactions_posted_date stays: its entries end with the rowid, so it
+serves the transaction list's ORDER BY posted_date DESC, id DESC and its
+(posted_date, id) keyset cursor without a sort; idx_tx_date_type cannot,
+as transaction_type sits between posted_date and the rowid.
+
+category_id IS NULL is already served by idx_tx_cat_date's leading column
+and merchant_canonical by idx_transactions_merchant_canonical.
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+revision: str = "0017"
+down_revision: Union[str, None] = "0016"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+_INDEXES = [
+    ("idx_tx_date_type", ["posted_date", "transaction_type"]),
+    ("idx_transactions_category_rule_id", ["category_rule_id"]),
+]
+
+
+def upgrade() -> None:
+    for name, columns in _INDEXES:
+        op.create_index(name, "transactions", columns, if_not_exists=True)
+
+
+def downgrade() -> None:
+    for name, _ in reversed(_INDEXES):
+        op.drop_index(name, table_name="transactions")
@@ -0,0 +1,122 @@
+"""Index merchant_canonical in the trigram FTS table
+
+Revision ID: 0018
+Revises: 0017
+Create Date: 2026-10-16 00:00:00.000000
+
+Changes:
+  - transactions_fts gains a merchant_canonical column and is rebuilt from
+    the existing rows
+  - its sync triggers are recreated to carry the new column (the update
+    trigger now also fires on merchant_canonical)
+
+Substring merchant search filters through this table, so both merchant
+columns are answered by the trigram index instead of a LIKE over every
+transaction.  The table is external-content; rebuilding it touches no
+transaction data.
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+revision: str = "0018"
+down_revision: Union[str, None] = "0017"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+_TRIGGER_NAMES = (
+    "trg_transactions_fts_insert",
+    "trg_transactions_fts_delete",
+    "trg_transactions_fts_update",
+)
+
+# Mirrors app.models.TRANSACTION_SEARCH_DDL as of this revision.
+_UPGRADE = (
+    """
+    CREATE VIRTUAL TABLE transactions_fts USING fts5(
+        description_raw, description_norm, merchant, merchant_canonical,
+        content='transactions', content_rowid='id', tokenize='trigram'
+    )
+    """,
+    """
+    CREATE TRIGGER trg_transactions_fts_insert
+    AFTER INSERT ON transactions
+    BEGIN
+        INSERT INTO transactions_fts(rowid, description_raw, description_norm, merchant, merchant_canonical)
+        VALUES (NEW.id, NEW.description_raw, NEW.description_norm, NEW.merchant, NEW.merchant_canonical);
+    END
+    """,
+    """
+    CREATE TRIGGER trg_transactions_fts_delete
+    AFTER DELETE ON transactions
+    BEGIN
+        INSERT INTO transactions_fts(transactions_fts, rowid, description_raw, description_norm, merchant, merchant_canonical)
+        VALUES ('delete', OLD.id, OLD.description_raw, OLD.description_norm, OLD.merchant, OLD.merchant_canonical);
+    END
+    """,
+    """
+    CREATE TRIGGER trg_transactions_fts_update
+    AFTER UPDATE OF description_raw, description_norm, merchant, merchant_canonical ON transactions
+    BEGIN
+        INSERT INTO transactions_fts(transactions_fts, rowid, description_raw, description_norm, merchant, merchant_canonical)
+        VALUES ('delete', OLD.id, OLD.description_raw, OLD.description_norm, OLD.merchant, OLD.merchant_canonical);
+        INSERT INTO transactions_fts(rowid, description_raw, description_norm, merchant, merchant_canonical)
+        VALUES (NEW.id, NEW.description_raw, NEW.description_norm, NEW.merchant, NEW.merchant_canonical);
+    END
+    """,
+)
+
+# The 0016 definitions.
+_DOWNGRADE = (
+    """
+    CREATE VIRTUAL TABLE transactions_fts USING fts5(
+        description_raw, description_norm, merchant,
+        content='transactions', content_rowid='id', tokenize='trigram'
+    )
+    """,
+    """
+    CREATE TRIGGER trg_transactions_fts_insert
+    AFTER INSERT ON transactions
+    BEGIN
+        INSERT INTO transactions_fts(rowid, description_raw, description_norm, merchant)
+        VALUES (NEW.id, NEW.description_raw, NEW.description_norm, NEW.merchant);
+    END
+    """,
+    """
+    CREATE TRIGGER trg_transactions_fts_delete
+    AFTER DELETE ON transactions
+    BEGIN
+        INSERT INTO transactions_fts(transactions_fts, rowid, description_raw, description_norm, merchant)
+        VALUES ('delete', OLD.id, OLD.description_raw, OLD.description_norm, OLD.merchant);
+    END
+    """,
+    """
+    CREATE TRIGGER trg_transactions_fts_update
+    AFTER UPDATE OF description_raw, description_norm, merchant ON transactions
+    BEGIN
+        INSERT INTO transactions_fts(transactions_fts, rowid, description_raw, description_norm, merchant)
+        VALUES ('delete', OLD.id, OLD.description_raw, OLD.description_norm, OLD.merchant);
+        INSERT INTO transactions_fts(rowid, description_raw, description_norm, merchant)
+        VALUES (NEW.id, NEW.description_raw, NEW.description_norm, NEW.merchant);
+    END
+    """,
+)
+
+
+def _recreate(ddl: tuple[str, ...]) -> None:
+    for name in _TRIGGER_NAMES:
+        op.execute(f"DROP TRIGGER IF EXISTS {name}")
+    op.execute("DROP TABLE IF EXISTS transactions_fts")
+    op.execute(ddl[0])
+    op.execute("INSERT INTO transactions_fts(transactions_fts) VALUES ('rebuild')")
+    for trigger in ddl[1:]:
+        op.execute(trigger)
+
+
+def upgrade() -> None:
+    _recreate(_UPGRADE)
+
+
+def downgrade() -> None:
+    _recreate(_DOWNGRADE)
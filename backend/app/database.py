@@ -1,13 +1,33 @@
+import functools
+import itertools
 import re
+import sqlite3
+import threading
 from pathlib import Path
-from typing import Generator, Optional
+from typing import Any, Generator, Optional
 
+import orjson
 from fastapi import Depends, Header, Query
-from sqlalchemy import create_engine, Engine, inspect
+from sqlalchemy import create_engine, Engine, event, text, Text
+from sqlalchemy.types import TypeDecorator
 from sqlalchemy.orm import declarative_base, sessionmaker, Session
+from sqlalchemy.pool import QueuePool
 
 Base = declarative_base()
 
+
+class JSONType(TypeDecorator):
+    """JSON stored as TEXT, serialized with orjson instead of the stdlib json module."""
+
+    impl = Text
+    cache_ok = True
+
+    def process_bind_param(self, value: Any, dialect) -> Optional[str]:
+        return None if value is None else orjson.dumps(value).decode()
+
+    def process_result_value(self, value: Optional[str], dialect) -> Any:
+        return None if value is None else orjson.loads(value)
+
 # profiles/ lives next to the backend/ directory (repo root)
 PROFILES_DIR = Path(__file__).parent.parent.parent / "profiles"
 
@@ -16,30 +36,207 @@ BACKEND_DIR = Path(__file__).parent.parent          # …/backend/
 ALEMBIC_DIR = BACKEND_DIR / "alembic"
 
 _engines: dict[str, Engine] = {}
+# One Session factory per profile, built alongside its engine.  Sessions don't
+# expire attributes on commit: every session is request-scoped and closed right
+# after the response is built, so reloading rows after commit is wasted work.
+_sessionmakers: dict[str, sessionmaker] = {}
+# Profiles are initialised in parallel at startup, so engine creation is guarded.
+_engines_lock = threading.Lock()
+
+# Per-profile data generation, replaced with a fresh value from one
+# process-wide counter after every Session commit, when a profile's DB is
+# removed, and when data_watermark() sees a commit from outside this process,
+# so a value is never reused even if a profile is recreated.
+_generations: dict[str, int] = {}
+_generation_counter = itertools.count(1)
+
+# Alembic Config + head revision are built once per process; scanning the
+# versions/ directory is the expensive part of running migrations in-process.
+# The Config is shared, so swapping its sqlalchemy.url and running a command
+# happen under _alembic_lock.
+_alembic_lock = threading.Lock()
+_alembic_cfg = None
+_alembic_head: Optional[str] = None
+
+
+# Profiles already migrated and seeded in this process; init_profile_db returns
+# straight away for these.
+_fully_initialized: set[str] = set()
+
+# Profiles whose startup init is still running in the background
+# (MIGRATION_MODE=async).  Requests for them get a 503 rather than a
+# half-built DB; the lifespan hook clears an entry once its init succeeds.
+pending_profiles: set[str] = set()
+
 
+_PROFILE_NAME_RE = re.compile(r"[^a-z0-9_-]")
 
+
+# Called on every request via the get_db dependencies; the set of profile
+# names in play is tiny, so a small bounded cache turns this into a dict hit.
+@functools.lru_cache(maxsize=256)
 def _sanitize_profile_name(name: str) -> str:
-    return re.sub(r"[^a-z0-9_-]", "", name.lower())[:50]
-
-
-def get_or_create_engine(profile: str, *, allow_create: bool = False) -> Engine:
-    safe = _sanitize_profile_name(profile) or "default"
-    if safe not in _engines:
-        PROFILES_DIR.mkdir(parents=True, exist_ok=True)
-        db_path = PROFILES_DIR / f"{safe}.db"
-        if not allow_create and not db_path.exists():
-            raise FileNotFoundError(f"Profile '{safe}' does not exist.")
-        engine = create_engine(
-            f"sqlite:///{db_path}",
-            connect_args={"check_same_thread": False},
-        )
-        Base.metadata.create_all(bind=engine)
-        _engines[safe] = engine
-    return _engines[safe]
+    return _PROFILE_NAME_RE.sub("", name.lower())[:50]
+
+
+def _set_sqlite_pragmas(dbapi_conn, _connection_record) -> None:
+    """Per-connection SQLite tuning.
+
+    WAL lets readers proceed while a write is in flight and, with
+    synchronous=NORMAL, avoids an fsync on every commit.  busy_timeout makes
+    a connection wait for the write lock instead of failing immediately.
+    """
+    cur = dbapi_conn.cursor()
+    cur.execute("PRAGMA foreign_keys=ON")  # ON DELETE CASCADE is declared in the schema
+    cur.execute("PRAGMA journal_mode=WAL")
+    cur.execute("PRAGMA synchronous=NORMAL")
+    cur.execute("PRAGMA busy_timeout=5000")
+    cur.execute("PRAGMA temp_store=MEMORY")
+    cur.execute("PRAGMA cache_size=-65536")  # 64 MiB
+    cur.execute("PRAGMA mmap_size=268435456")  # 256 MiB
+    cur.close()
+
+
+def get_or_create_engine(
+    profile: str, *, allow_create: bool = False, create_tables: bool = True
+) -> Engine:
+    return _engine_for(
+        _sanitize_profile_name(profile) or "default",
+        allow_create=allow_create,
+        create_tables=create_tables,
+    )
+
+
+def _has_schema(engine: Engine) -> bool:
+    with engine.connect() as conn:
+        return conn.execute(
+            text("SELECT 1 FROM sqlite_master WHERE type='table' AND name='transactions'")
+        ).first() is not None
+
+
+def _engine_for(safe: str, *, allow_create: bool = False, create_tables: bool = True) -> Engine:
+    """Engine lookup/creation for a name that has already been sanitized.
+
+    ``create_all`` only runs when ``create_tables`` is set and the DB has no
+    schema yet; existing DBs get missing tables from their Alembic upgrade.
+    """
+    engine = _engines.get(safe)
+    if engine is not None:
+        return engine
+    with _engines_lock:
+        if safe not in _engines:
+            PROFILES_DIR.mkdir(parents=True, exist_ok=True)
+            db_path = PROFILES_DIR / f"{safe}.db"
+            if not allow_create and not db_path.exists():
+                raise FileNotFoundError(f"Profile '{safe}' does not exist.")
+            # A small pool of long-lived connections keeps each one's page
+            # cache (and the PRAGMAs above) warm across requests.
+            engine = create_engine(
+                f"sqlite:///{db_path}",
+                connect_args={"check_same_thread": False},
+                poolclass=QueuePool,
+                pool_size=8,
+                max_overflow=4,
+            )
+            event.listen(engine, "connect", _set_sqlite_pragmas)
+            if create_tables and not _has_schema(engine):
+                Base.metadata.create_all(bind=engine)
+            factory = sessionmaker(
+                autocommit=False,
+                autoflush=False,
+                expire_on_commit=False,
+                bind=engine,
+                info={"profile": safe},
+            )
+            event.listen(factory, "after_commit", _bump_generation)
+            _sessionmakers[safe] = factory
+            _engines[safe] = engine
+        return _engines[safe]
+
+
+def _session_factory(safe: str, *, allow_create: bool = False) -> sessionmaker:
+    """Return the cached Session factory for an already-sanitized profile name."""
+    factory = _sessionmakers.get(safe)
+    if factory is None:
+        _engine_for(safe, allow_create=allow_create)
+        factory = _sessionmakers[safe]
+    return factory
+
+
+def remove_profile_db(safe: str) -> None:
+    """Dispose a profile's cached engine and delete its DB file plus WAL sidecars.
+
+    A leftover ``-wal`` file would be replayed into a new DB created at the
+    same path, so the sidecars must go with the main file.
+    """
+    with _engines_lock:
+        _sessionmakers.pop(safe, None)
+        engine = _engines.pop(safe, None)
+    if engine is not None:
+        engine.dispose()
+    _fully_initialized.discard(safe)
+    _generations[safe] = next(_generation_counter)
+    for suffix in ("", "-wal", "-shm"):
+        (PROFILES_DIR / f"{safe}.db{suffix}").unlink(missing_ok=True)
+
+
+def _bump_generation(session: Session) -> None:
+    _generations[session.info["profile"]] = next(_generation_counter)
+
+
+def data_watermark(db: Session) -> tuple:
+    """A cheap token that changes whenever anything is committed to db's profile.
+
+    Commits through a Session from this process move the profile's generation
+    on directly.  Anything else — another worker, the alembic CLI, a sqlite3
+    shell — is caught by ``PRAGMA data_version`` on the request's connection,
+    which SQLite changes whenever another connection has committed; a change
+    seen there (or a connection seen for the first time) also moves the
+    generation on.  Read it before computing a cached result: a commit landing
+    mid-way then only strands that entry under an old token.  For keying
+    read-mostly result caches.
+    """
+    profile = db.info["profile"]
+    conn = db.connection()
+    version = conn.exec_driver_sql("PRAGMA data_version").scalar()
+    # .info lives with the pooled DBAPI connection, across checkouts.
+    seen = conn.connection.info
+    if seen.get("data_version") != version:
+        seen["data_version"] = version
+        _generations[profile] = next(_generation_counter)
+    return (profile, _generations.get(profile, 0))
+
+
+def _alembic_config():
+    """Return the shared Alembic ``(Config, head_revision)``, building them on first use."""
+    global _alembic_cfg, _alembic_head
+    with _alembic_lock:
+        if _alembic_cfg is None:
+            from alembic.config import Config
+            from alembic.script import ScriptDirectory
+
+            cfg = Config()
+            cfg.set_main_option("script_location", str(ALEMBIC_DIR))
+            _alembic_head = ScriptDirectory.from_config(cfg).get_current_head()
+            _alembic_cfg = cfg
+    return _alembic_cfg, _alembic_head
 
 
-def _run_alembic_upgrade(db_url: str, *, is_new_db: bool = False) -> None:
-    """Run Alembic migrations to head for the given SQLite DB URL.
+def _legacy_baseline(conn) -> str:
+    """Revision to stamp a pre-Alembic DB at, judged from its transactions columns.
+
+    Most legacy DBs match 0007.  Ones old enough to still store ``amount`` as a
+    float are stamped 0004 instead, so 0005 converts them to cents and adds every
+    later column in a single table rebuild.
+    """
+    columns = {row[1] for row in conn.execute(text("PRAGMA table_info(transactions)"))}
+    if "amount" in columns and "amount_cents" not in columns:
+        return "0004"
+    return "0007"
+
+
+def _run_alembic_upgrade(engine: Engine, *, is_new_db: bool = False) -> None:
+    """Run Alembic migrations to head for the profile DB behind *engine*.
 
     Strategy:
     - Brand-new DBs (``is_new_db=True``): ``create_all`` already built the full
@@ -49,34 +246,68 @@ def _run_alembic_upgrade(db_url: str, *, is_new_db: bool = False) -> None:
       ``upgrade head`` to apply any pending migrations.
     - Legacy DBs created before Alembic was integrated (no ``alembic_version``
       table but tables exist): stamp to "0007" (the schema at the time Alembic
-      was adopted) then run ``upgrade head`` to apply new migrations.
+      was adopted), or "0004" if transactions still has the float ``amount``
+      column, then run ``upgrade head`` to apply new migrations.
+    - DBs already at head are left alone without invoking Alembic at all.
     """
-    from alembic.config import Config
     from alembic import command
+    from alembic.runtime.migration import MigrationContext
 
-    alembic_cfg = Config()
-    alembic_cfg.set_main_option("script_location", str(ALEMBIC_DIR))
-    alembic_cfg.set_main_option("sqlalchemy.url", db_url)
+    alembic_cfg, head = _alembic_config()
+    db_url = str(engine.url)
 
     if is_new_db:
         # Brand-new DB: schema is current; just record the head revision.
-        command.stamp(alembic_cfg, "head")
+        with _alembic_lock:
+            alembic_cfg.set_main_option("sqlalchemy.url", db_url)
+            command.stamp(alembic_cfg, "head")
         return
 
-    # Existing DB: check whether Alembic has been run before.
-    tmp_engine = create_engine(db_url, connect_args={"check_same_thread": False})
+    # Existing DB: check whether Alembic has been run before, and where it is.
+    with engine.connect() as conn:
+        has_alembic_version = conn.execute(
+            text("SELECT 1 FROM sqlite_master WHERE type='table' AND name='alembic_version'")
+        ).first() is not None
+        current = (
+            MigrationContext.configure(conn).get_current_revision()
+            if has_alembic_version
+            else _legacy_baseline(conn)
+        )
+
+    if current == head:
+        return
+
+    with _alembic_lock:
+        alembic_cfg.set_main_option("sqlalchemy.url", db_url)
+        if not has_alembic_version:
+            # Legacy DB created via create_all + ALTER TABLE before Alembic adoption.
+            # Stamp to its detected baseline so only the missing migrations run.
+            command.stamp(alembic_cfg, current)
+
+        # Apply any pending migrations (e.g., 0008+ added in Pass 1).
+        command.upgrade(alembic_cfg, "head")
+
+
+def _is_current(db_path: Path, head: Optional[str]) -> bool:
+    """True if an existing DB is already at the Alembic head and current seed version.
+
+    Uses one plain sqlite3 connection, so a warm profile costs neither an
+    engine, create_all, nor an Alembic environment.
+    """
+    conn = sqlite3.connect(db_path)
     try:
-        has_alembic_version = "alembic_version" in inspect(tmp_engine).get_table_names()
+        revision = conn.execute("SELECT version_num FROM alembic_version").fetchone()
+        seeds = conn.execute("SELECT value FROM seed_state WHERE key = 'seeds_v'").fetchone()
+    except sqlite3.OperationalError:
+        return False  # pre-Alembic or never seeded
     finally:
-        tmp_engine.dispose()
+        conn.close()
+    return revision == (head,) and seeds == (SEEDS_V,)
 
-    if not has_alembic_version:
-        # Legacy DB created via create_all + ALTER TABLE before Alembic adoption.
-        # Stamp to 0007 (the pre-Pass-1 baseline) so only new migrations run.
-        command.stamp(alembic_cfg, "0007")
 
-    # Apply any pending migrations (e.g., 0008+ added in Pass 1).
-    command.upgrade(alembic_cfg, "head")
+# Bump whenever a seeder in services/seeder.py changes so existing profiles
+# re-run the seed pass once on their next startup.
+SEEDS_V = "v3"
 
 
 def init_profile_db(name: str) -> str:
@@ -93,20 +324,36 @@ def init_profile_db(name: str) -> str:
 
     safe = _sanitize_profile_name(name) or "default"
     db_path = PROFILES_DIR / f"{safe}.db"
-    db_url = f"sqlite:///{db_path}"
+
+    if safe in _fully_initialized:
+        return safe
 
     # Track whether this is a brand-new DB before create_all creates the file.
     is_new_db = not db_path.exists()
+    if not is_new_db and _is_current(db_path, _alembic_config()[1]):
+        _fully_initialized.add(safe)
+        return safe
 
-    # create_all ensures tables exist for new DBs; no-op for existing ones.
-    engine = get_or_create_engine(safe, allow_create=True)
+    # create_all builds the schema for new DBs only; existing ones are left to Alembic.
+    engine = _engine_for(safe, allow_create=True, create_tables=is_new_db)
 
     # Run Alembic migrations — stamps new DBs to head, upgrades existing ones.
-    _run_alembic_upgrade(db_url, is_new_db=is_new_db)
+    _run_alembic_upgrade(engine, is_new_db=is_new_db)
 
-    _SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
-    db = _SessionLocal()
+    db = _session_factory(safe)()
     try:
+        db.execute(text(
+            "CREATE TABLE IF NOT EXISTS seed_state "
+            "(key VARCHAR(50) PRIMARY KEY, value VARCHAR(50) NOT NULL)"
+        ))
+        seeded = db.execute(
+            text("SELECT value FROM seed_state WHERE key = 'seeds_v'")
+        ).scalar()
+        if seeded == SEEDS_V:
+            db.commit()
+            _fully_initialized.add(safe)
+            return safe
+
         seed_categories(db)
         seed_rules(db)
         seed_transfer_rules(db)
@@ -118,8 +365,15 @@ def init_profile_db(name: str) -> str:
             # Real profiles — run personal-data cleanup seeds.
             seed_401k_loan_note(db)
             delete_personal_zelle(db)
+
+        db.execute(
+            text("INSERT OR REPLACE INTO seed_state (key, value) VALUES ('seeds_v', :v)"),
+            {"v": SEEDS_V},
+        )
+        db.commit()
     finally:
         db.close()
+    _fully_initialized.add(safe)
     return safe
 
 
@@ -127,37 +381,48 @@ def get_profile_name(x_profile: str = Header(default="default")) -> str:
     return _sanitize_profile_name(x_profile) or "default"
 
 
-def get_db(
-    profile: str = Depends(get_profile_name),
-) -> Generator[Session, None, None]:
+def get_session_factory(profile: str = Depends(get_profile_name)) -> sessionmaker:
+    """The profile's Session factory, for endpoints that must not hold one session throughout.
+
+    Long-running handlers (e.g. streaming LLM chat) open short-lived sessions
+    from it, so no pooled connection is pinned while waiting on the network.
+    """
+    return _request_session_factory(profile)
+
+
+def _request_session_factory(safe: str) -> sessionmaker:
+    """Session factory lookup for request dependencies, mapped to HTTP errors."""
+    from fastapi import HTTPException
+
+    if safe in pending_profiles:
+        raise HTTPException(
+            status_code=503, detail=f"Profile '{safe}' is still being initialised."
+        )
     try:
-        engine = get_or_create_engine(profile)
+        return _session_factory(safe)
     except FileNotFoundError as exc:
-        from fastapi import HTTPException
         raise HTTPException(status_code=404, detail=str(exc))
-    _SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
-    db = _SessionLocal()
+
+
+def get_db(
+    session_factory: sessionmaker = Depends(get_session_factory),
+) -> Generator[Session, None, None]:
+    db = session_factory()
     try:
         yield db
     finally:
         db.close()
 
 
-def get_db_download(
+def get_download_session_factory(
     profile: Optional[str] = Query(default=None),
     x_profile: str = Header(default="default"),
-) -> Generator[Session, None, None]:
-    """Like get_db but also accepts ?profile= query param (for browser-navigated downloads)."""
+) -> sessionmaker:
+    """Like get_session_factory but also accepts ?profile= (for browser-navigated downloads).
+
+    Streaming downloads open their session inside the response generator:
+    yield-dependencies are torn down before the body is sent.
+    """
     name = profile if profile else x_profile
-    safe = _sanitize_profile_name(name) or "default"
-    try:
-        engine = get_or_create_engine(safe)
-    except FileNotFoundError as exc:
-        from fastapi import HTTPException
-        raise HTTPException(status_code=404, detail=str(exc))
-    _SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
-    db = _SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
+    return _request_session_factory(_sanitize_profile_name(name) or "default")
+
@@ -1,15 +1,42 @@
+import asyncio
+import functools
+import logging
+import os
 import shutil
+from concurrent.futures import ThreadPoolExecutor
 from contextlib import asynccontextmanager
 from pathlib import Path
 
 from fastapi import Depends, FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 
-from .database import PROFILES_DIR, init_profile_db
+from .database import PROFILES_DIR, init_profile_db, pending_profiles, remove_profile_db
 from .routers import audit, categories, imports, llm, merchants as merchants_router, reports, rules, tags as tags_router, transactions
 from .routers import profiles as profiles_router
 from .security import RequireAPIAuth
 
+logger = logging.getLogger(__name__)
+
+
+def _init_profiles(names: list[str]) -> None:
+    """Migrate and seed profile DBs in parallel — each profile is its own SQLite file."""
+    if not names:
+        return
+    with ThreadPoolExecutor(max_workers=min(8, len(names))) as pool:
+        # list() re-raises the first exception from any worker
+        list(pool.map(init_profile_db, names))
+
+
+def _finish_background_init(names: list[str], future: asyncio.Future) -> None:
+    """Done-callback for the deferred profile init: open the profiles up, or
+    log the failure — they keep answering 503 until the next restart."""
+    exc = future.exception()
+    if exc is not None:
+        logger.error("Background init of profiles %s failed", names, exc_info=exc)
+        return
+    pending_profiles.difference_update(names)
+
 
 @asynccontextmanager
 async def lifespan(_app: FastAPI):
@@ -25,22 +52,34 @@ async def lifespan(_app: FastAPI):
     # Run Alembic migrations for every existing profile DB (except "sample" which
     # is always recreated below), then seed idempotently.
     existing_profiles = sorted(p.stem for p in PROFILES_DIR.glob("*.db") if p.stem != "sample")
-    for profile_name in existing_profiles:
-        init_profile_db(profile_name)
+    profiles_to_init = list(existing_profiles)
 
     # Ensure at least a "default" profile exists.
     if "default" not in existing_profiles:
-        init_profile_db("default")
+        profiles_to_init.append("default")
 
     # Always recreate the "sample" demo profile so seed data uses rolling
     # recent-month dates (not hardcoded Q4 2024).
-    sample_db = PROFILES_DIR / "sample.db"
-    if sample_db.exists():
-        sample_db.unlink()
-    init_profile_db("sample")
+    remove_profile_db("sample")
+    deferred = ["sample"]
+
+    # Real profiles are always migrated before the app serves requests.  With
+    # MIGRATION_MODE=async only the sample re-seed runs in the background;
+    # until it finishes, requests for it get a 503.
+    loop = asyncio.get_running_loop()
+    init_task = None
+    if os.getenv("MIGRATION_MODE", "").lower() == "async":
+        await loop.run_in_executor(None, _init_profiles, profiles_to_init)
+        pending_profiles.update(deferred)
+        init_task = loop.run_in_executor(None, _init_profiles, deferred)
+        init_task.add_done_callback(functools.partial(_finish_background_init, deferred))
+    else:
+        await loop.run_in_executor(None, _init_profiles, profiles_to_init + deferred)
 
     yield
-    # ── Shutdown (nothing needed for SQLite) ──────────────────────────────────
+    # ── Shutdown — let a background profile init finish before exiting ───────
+    if init_task is not None:
+        await asyncio.gather(init_task, return_exceptions=True)
 
 
 app = FastAPI(
@@ -49,6 +88,8 @@ app = FastAPI(
     version="0.2.0",
     lifespan=lifespan,
     dependencies=[RequireAPIAuth],
+    # Streaming endpoints return their own StreamingResponse and are unaffected.
+    default_response_class=ORJSONResponse,
 )
 
 app.add_middleware(
@@ -1,9 +1,9 @@
 from datetime import datetime, timezone
 
-from sqlalchemy import Boolean, Column, DateTime, ForeignKey, Integer, JSON, String, Table, Text
+from sqlalchemy import DDL, Boolean, Column, DateTime, ForeignKey, Index, Integer, String, Table, Text, event
 from sqlalchemy.orm import relationship
 
-from .database import Base
+from .database import Base, JSONType
 
 # ── Association table for transaction ↔ tag many-to-many ──────────────────────
 
@@ -49,8 +49,10 @@ class Category(Base):
     tax_deductible = Column(Boolean, nullable=False, default=False)
     created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
 
-    transactions = relationship("Transaction", back_populates="category")
-    rules = relationship("Rule", back_populates="category", cascade="all, delete-orphan")
+    transactions = relationship("Transaction", back_populates="category", lazy="raise_on_sql")
+    rules = relationship(
+        "Rule", back_populates="category", cascade="all, delete-orphan", lazy="raise_on_sql"
+    )
 
 
 class Rule(Base):
@@ -64,7 +66,7 @@ class Rule(Base):
     is_active = Column(Boolean, nullable=False, default=True)
     created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
 
-    category = relationship("Category", back_populates="rules")
+    category = relationship("Category", back_populates="rules", lazy="raise_on_sql")
 
 
 class Import(Base):
@@ -74,20 +76,36 @@ class Import(Base):
     filename = Column(String(255), nullable=False)
     file_hash = Column(String(64), nullable=False, unique=True, index=True)
     source_type = Column(String(50), nullable=False, default="generic")
-    column_mapping = Column(JSON, nullable=True)
+    column_mapping = Column(JSONType, nullable=True)
     account_label = Column(String(100), nullable=True)
     account_type = Column(String(20), nullable=True)   # checking | savings | credit
     notes = Column(Text, nullable=True)
+    # Maintained by the transactions triggers below; never written by the app.
+    transaction_count = Column(Integer, nullable=False, default=0, server_default="0")
     created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
 
-    transactions = relationship("Transaction", back_populates="import_record")
+    transactions = relationship(
+        "Transaction",
+        back_populates="import_record",
+        cascade="all, delete-orphan",
+        passive_deletes=True,
+        lazy="raise_on_sql",
+    )
 
 
 class Transaction(Base):
     __tablename__ = "transactions"
+    __table_args__ = (
+        Index("idx_transactions_posted_date", "posted_date"),
+        Index("idx_tx_date_type", "posted_date", "transaction_type"),
+        Index("idx_transactions_merchant_canonical", "merchant_canonical"),
+        Index("idx_tx_cat_date", "category_id", "posted_date"),
+        Index("idx_transactions_import_id", "import_id"),
+        Index("idx_transactions_category_rule_id", "category_rule_id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
-    import_id = Column(Integer, ForeignKey("imports.id"), nullable=False)
+    import_id = Column(Integer, ForeignKey("imports.id", ondelete="CASCADE"), nullable=False)
     posted_date = Column(String(20), nullable=False)
     description_raw = Column(Text, nullable=False)
     description_norm = Column(Text, nullable=False)
@@ -108,10 +126,87 @@ class Transaction(Base):
     note = Column(Text, nullable=True)
     created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
 
-    import_record = relationship("Import", back_populates="transactions")
-    category = relationship("Category", back_populates="transactions")
-    category_rule = relationship("Rule", foreign_keys=[category_rule_id])
-    tags = relationship("Tag", secondary=transaction_tags, back_populates="transactions", lazy="select")
+    import_record = relationship("Import", back_populates="transactions", lazy="raise_on_sql")
+    category = relationship("Category", back_populates="transactions", lazy="raise_on_sql")
+    category_rule = relationship("Rule", foreign_keys=[category_rule_id], lazy="raise_on_sql")
+    tags = relationship(
+        "Tag", secondary=transaction_tags, back_populates="transactions", lazy="raise_on_sql"
+    )
+
+
+# Keep imports.transaction_count in step with the transactions table.  Fresh
+# DBs get these from create_all; existing ones from migration 0015.
+TRANSACTION_COUNT_TRIGGERS = (
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_transactions_count_insert
+    AFTER INSERT ON transactions
+    BEGIN
+        UPDATE imports SET transaction_count = transaction_count + 1
+        WHERE id = NEW.import_id;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_transactions_count_delete
+    AFTER DELETE ON transactions
+    BEGIN
+        UPDATE imports SET transaction_count = transaction_count - 1
+        WHERE id = OLD.import_id;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_transactions_count_move
+    AFTER UPDATE OF import_id ON transactions
+    WHEN OLD.import_id IS NOT NEW.import_id
+    BEGIN
+        UPDATE imports SET transaction_count = transaction_count - 1
+        WHERE id = OLD.import_id;
+        UPDATE imports SET transaction_count = transaction_count + 1
+        WHERE id = NEW.import_id;
+    END
+    """,
+)
+
+# Trigram FTS5 index over the text columns, for substring payee matching
+# (income_housing) and merchant search.  External-content, so rows live only
+# in transactions.  Fresh DBs get these from create_all; existing ones from
+# migrations 0016 and 0018.
+TRANSACTION_SEARCH_DDL = (
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS transactions_fts USING fts5(
+        description_raw, description_norm, merchant, merchant_canonical,
+        content='transactions', content_rowid='id', tokenize='trigram'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_transactions_fts_insert
+    AFTER INSERT ON transactions
+    BEGIN
+        INSERT INTO transactions_fts(rowid, description_raw, description_norm, merchant, merchant_canonical)
+        VALUES (NEW.id, NEW.description_raw, NEW.description_norm, NEW.merchant, NEW.merchant_canonical);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_transactions_fts_delete
+    AFTER DELETE ON transactions
+    BEGIN
+        INSERT INTO transactions_fts(transactions_fts, rowid, description_raw, description_norm, merchant, merchant_canonical)
+        VALUES ('delete', OLD.id, OLD.description_raw, OLD.description_norm, OLD.merchant, OLD.merchant_canonical);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_transactions_fts_update
+    AFTER UPDATE OF description_raw, description_norm, merchant, merchant_canonical ON transactions
+    BEGIN
+        INSERT INTO transactions_fts(transactions_fts, rowid, description_raw, description_norm, merchant, merchant_canonical)
+        VALUES ('delete', OLD.id, OLD.description_raw, OLD.description_norm, OLD.merchant, OLD.merchant_canonical);
+        INSERT INTO transactions_fts(rowid, description_raw, description_norm, merchant, merchant_canonical)
+        VALUES (NEW.id, NEW.description_raw, NEW.description_norm, NEW.merchant, NEW.merchant_canonical);
+    END
+    """,
+)
+
+for _ddl in TRANSACTION_COUNT_TRIGGERS + TRANSACTION_SEARCH_DDL:
+    event.listen(Transaction.__table__, "after_create", DDL(_ddl))
 
 
 class Tag(Base):
@@ -123,7 +218,7 @@ class Tag(Base):
     created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
 
     transactions = relationship(
-        "Transaction", secondary=transaction_tags, back_populates="tags", lazy="select"
+        "Transaction", secondary=transaction_tags, back_populates="tags", lazy="raise_on_sql"
     )
 
 
@@ -10,7 +10,8 @@ router = APIRouter(prefix="/categories", tags=["categories"])
 
 
 def _to_schema(cat: Category, tx_count: int) -> CategorySchema:
-    return CategorySchema(
+    # Built from a loaded ORM row, so field validation is skipped.
+    return CategorySchema.model_construct(
         id=cat.id,
         name=cat.name,
         color=cat.color,
@@ -25,19 +26,19 @@ def _to_schema(cat: Category, tx_count: int) -> CategorySchema:
 
 @router.get("/", response_model=list[CategorySchema], summary="List all categories")
 def list_categories(db: Session = Depends(get_db)):
-    counts: dict[int, int] = dict(
-        db.query(Transaction.category_id, func.count(Transaction.id))
-        .filter(Transaction.category_id.isnot(None))
-        .group_by(Transaction.category_id)
+    rows = (
+        db.query(Category, func.count(Transaction.id))
+        .outerjoin(Transaction, Transaction.category_id == Category.id)
+        .group_by(Category.id)
+        .order_by(Category.name)
         .all()
     )
-    cats = db.query(Category).order_by(Category.name).all()
-    return [_to_schema(c, counts.get(c.id, 0)) for c in cats]
+    return [_to_schema(c, n) for c, n in rows]
 
 
 @router.post("/", response_model=CategorySchema, status_code=201, summary="Create a category")
 def create_category(payload: CategoryCreate, db: Session = Depends(get_db)):
-    if db.query(Category).filter(Category.name == payload.name).first():
+    if db.query(Category.id).filter(Category.name == payload.name).first():
         raise HTTPException(status_code=409, detail=f"Category '{payload.name}' already exists.")
     cat = Category(
         name=payload.name,
@@ -48,7 +49,6 @@ def create_category(payload: CategoryCreate, db: Session = Depends(get_db)):
     )
     db.add(cat)
     db.commit()
-    db.refresh(cat)
     return _to_schema(cat, 0)
 
 
@@ -57,7 +57,7 @@ def update_category(cat_id: int, payload: CategoryUpdate, db: Session = Depends(
     cat = _get_or_404(db, cat_id)
     # Check name uniqueness if name changed
     if payload.name != cat.name:
-        if db.query(Category).filter(Category.name == payload.name).first():
+        if db.query(Category.id).filter(Category.name == payload.name).first():
             raise HTTPException(status_code=409, detail=f"Category '{payload.name}' already exists.")
     cat.name = payload.name
     cat.color = payload.color
@@ -65,7 +65,6 @@ def update_category(cat_id: int, payload: CategoryUpdate, db: Session = Depends(
     cat.monthly_budget = payload.monthly_budget
     cat.tax_deductible = payload.tax_deductible
     db.commit()
-    db.refresh(cat)
     tx_count = db.query(func.count(Transaction.id)).filter(Transaction.category_id == cat_id).scalar() or 0
     return _to_schema(cat, tx_count)
 
@@ -73,18 +72,24 @@ def update_category(cat_id: int, payload: CategoryUpdate, db: Session = Depends(
 @router.delete("/{cat_id}", status_code=204, summary="Delete a category")
 def delete_category(cat_id: int, db: Session = Depends(get_db)):
     cat = _get_or_404(db, cat_id)
-    # Null out transactions that referenced this category (and their provenance)
+    # Null out transactions that referenced this category (and their provenance).
+    # None of those rows are loaded in this request-scoped session, so there is
+    # nothing to synchronize.
     db.query(Transaction).filter(Transaction.category_id == cat_id).update(
-        {"category_id": None, "category_source": None, "category_rule_id": None},
-        synchronize_session="fetch",
+        {"category_id": None, "category_source": "uncategorized", "category_rule_id": None},
+        synchronize_session=False,
     )
-    # Rules are cascade-deleted via the relationship
+    # Rules are cascade-deleted via the relationship; drop provenance links to
+    # them from transactions filed elsewhere, or the FK would block the delete.
+    db.query(Transaction).filter(
+        Transaction.category_rule_id.in_(db.query(Rule.id).filter(Rule.category_id == cat_id))
+    ).update({"category_rule_id": None}, synchronize_session=False)
     db.delete(cat)
     db.commit()
 
 
 def _get_or_404(db: Session, cat_id: int) -> Category:
-    cat = db.query(Category).filter(Category.id == cat_id).first()
+    cat = db.get(Category, cat_id)
     if not cat:
         raise HTTPException(status_code=404, detail="Category not found.")
     return cat
@@ -1,12 +1,14 @@
-import json
+import hashlib
+import os
 
+import orjson
 from fastapi import APIRouter, Depends, File, Form, HTTPException, UploadFile
+from fastapi.concurrency import run_in_threadpool
 from pydantic import ValidationError
-from sqlalchemy import func
 from sqlalchemy.orm import Session
 
 from ..database import get_db
-from ..models import Import, Transaction
+from ..models import Import
 from ..schemas import ColumnMappingInput, ImportRecord, ImportResponse, PatchImportLabel, PreviewResponse
 from ..services.csv_importer import import_csv, import_csv_with_mapping, import_paypal_csv, import_pdf_with_mapping, preview_csv
 from ..services.pdf_extractor import MAX_PREVIEW_ROWS, extract_pdf, extract_txt
@@ -29,12 +31,13 @@ async def upload_csv_legacy(
     db: Session = Depends(get_db),
 ):
     _require_csv(file)
-    content = await file.read()
-    _require_max_size(content, MAX_CSV_BYTES, "CSV")
+    content, file_hash = await _read_capped(file, MAX_CSV_BYTES, "CSV")
     _require_content(content)
 
     try:
-        result = import_csv(db, file.filename or "upload.csv", content, source_type)
+        result = await run_in_threadpool(
+            import_csv, db, file.filename or "upload.csv", content, source_type, file_hash=file_hash
+        )
     except ValueError as exc:
         raise HTTPException(status_code=422, detail=str(exc))
 
@@ -55,12 +58,11 @@ async def preview_csv_endpoint(
     file: UploadFile = File(...),
 ):
     _require_csv(file)
-    content = await file.read()
-    _require_max_size(content, MAX_CSV_BYTES, "CSV")
+    content, _ = await _read_capped(file, MAX_CSV_BYTES, "CSV")
     _require_content(content)
 
     try:
-        data = preview_csv(content)
+        data = await run_in_threadpool(preview_csv, content)
     except Exception as exc:
         raise HTTPException(status_code=422, detail=f"Could not parse CSV: {exc}")
 
@@ -87,25 +89,19 @@ async def import_csv_endpoint(
 ):
     _require_csv(file)
 
-    # Parse and validate the mapping JSON
-    try:
-        raw = json.loads(mapping)
-        mapping_obj = ColumnMappingInput(**raw)
-    except json.JSONDecodeError as exc:
-        raise HTTPException(status_code=422, detail=f"mapping is not valid JSON: {exc}")
-    except ValidationError as exc:
-        raise HTTPException(status_code=422, detail=exc.errors())
+    mapping_dict = _parse_mapping(mapping)
 
-    content = await file.read()
-    _require_max_size(content, MAX_CSV_BYTES, "CSV")
+    content, file_hash = await _read_capped(file, MAX_CSV_BYTES, "CSV")
     _require_content(content)
 
     try:
-        result = import_csv_with_mapping(
+        result = await run_in_threadpool(
+            import_csv_with_mapping,
             db,
             file.filename or "upload.csv",
             content,
-            mapping_obj.model_dump(exclude_none=False),
+            mapping_dict,
+            file_hash=file_hash,
         )
     except ValueError as exc:
         raise HTTPException(status_code=422, detail=str(exc))
@@ -128,12 +124,17 @@ async def import_paypal_endpoint(
     db: Session = Depends(get_db),
 ):
     _require_csv(file)
-    content = await file.read()
-    _require_max_size(content, MAX_CSV_BYTES, "CSV")
+    content, file_hash = await _read_capped(file, MAX_CSV_BYTES, "CSV")
     _require_content(content)
 
     try:
-        result = import_paypal_csv(db, file.filename or "paypal_export.csv", content)
+        result = await run_in_threadpool(
+            import_paypal_csv,
+            db,
+            file.filename or "paypal_export.csv",
+            content,
+            file_hash=file_hash,
+        )
     except ValueError as exc:
         raise HTTPException(status_code=422, detail=str(exc))
 
@@ -153,12 +154,12 @@ async def preview_pdf_endpoint(
     file: UploadFile = File(...),
 ):
     _require_pdf_or_txt(file)
-    content = await file.read()
-    _require_max_size(content, MAX_PDF_BYTES, "PDF/TXT")
+    content, _ = await _read_capped(file, MAX_PDF_BYTES, "PDF/TXT")
     _require_content(content)
 
     fname = file.filename or "upload.pdf"
-    result = extract_txt(content) if fname.lower().endswith(".txt") else extract_pdf(content)
+    extract = extract_txt if fname.lower().endswith(".txt") else extract_pdf
+    result = await run_in_threadpool(extract, content)
     result["filename"] = fname
 
     # Truncate rows to MAX_PREVIEW_ROWS so the response stays small;
@@ -185,24 +186,19 @@ async def import_pdf_endpoint(
 ):
     _require_pdf_or_txt(file)
 
-    try:
-        raw = json.loads(mapping)
-        mapping_obj = ColumnMappingInput(**raw)
-    except json.JSONDecodeError as exc:
-        raise HTTPException(status_code=422, detail=f"mapping is not valid JSON: {exc}")
-    except ValidationError as exc:
-        raise HTTPException(status_code=422, detail=exc.errors())
+    mapping_dict = _parse_mapping(mapping)
 
-    content = await file.read()
-    _require_max_size(content, MAX_PDF_BYTES, "PDF/TXT")
+    content, file_hash = await _read_capped(file, MAX_PDF_BYTES, "PDF/TXT")
     _require_content(content)
 
     try:
-        result = import_pdf_with_mapping(
+        result = await run_in_threadpool(
+            import_pdf_with_mapping,
             db,
             file.filename or "upload.pdf",
             content,
-            mapping_obj.model_dump(exclude_none=False),
+            mapping_dict,
+            file_hash=file_hash,
         )
     except ValueError as exc:
         raise HTTPException(status_code=422, detail=str(exc))
@@ -221,25 +217,34 @@ async def import_pdf_endpoint(
     summary="List all imported documents with transaction counts",
 )
 def list_imports(db: Session = Depends(get_db)):
+    # Select plain columns: no Import objects to hydrate, no column_mapping JSON to decode.
     rows = (
-        db.query(Import, func.count(Transaction.id).label("tx_count"))
-        .outerjoin(Transaction, Transaction.import_id == Import.id)
-        .group_by(Import.id)
+        db.query(
+            Import.id,
+            Import.filename,
+            Import.source_type,
+            Import.account_label,
+            Import.account_type,
+            Import.notes,
+            Import.created_at,
+            Import.transaction_count,
+        )
         .order_by(Import.created_at.desc())
         .all()
     )
+    # Rows come straight from the DB, so skip per-row validation here.
     return [
-        ImportRecord(
-            id=imp.id,
-            filename=imp.filename,
-            source_type=imp.source_type,
-            account_label=imp.account_label,
-            account_type=imp.account_type,
-            notes=imp.notes,
-            created_at=imp.created_at,
+        ImportRecord.model_construct(
+            id=imp_id,
+            filename=filename,
+            source_type=source_type,
+            account_label=account_label,
+            account_type=account_type,
+            notes=notes,
+            created_at=created_at,
             transaction_count=count,
         )
-        for imp, count in rows
+        for imp_id, filename, source_type, account_label, account_type, notes, created_at, count in rows
     ]
 
 
@@ -253,7 +258,7 @@ def patch_import(
     payload: PatchImportLabel,
     db: Session = Depends(get_db),
 ):
-    imp = db.query(Import).filter(Import.id == import_id).first()
+    imp = db.get(Import, import_id)
     if not imp:
         raise HTTPException(status_code=404, detail=f"Import {import_id} not found.")
 
@@ -265,13 +270,7 @@ def patch_import(
         imp.notes = payload.notes or None
 
     db.commit()
-    db.refresh(imp)
 
-    tx_count = (
-        db.query(func.count(Transaction.id))
-        .filter(Transaction.import_id == imp.id)
-        .scalar()
-    ) or 0
     return ImportRecord(
         id=imp.id,
         filename=imp.filename,
@@ -280,7 +279,7 @@ def patch_import(
         account_type=imp.account_type,
         notes=imp.notes,
         created_at=imp.created_at,
-        transaction_count=tx_count,
+        transaction_count=imp.transaction_count,
     )
 
 
@@ -293,10 +292,10 @@ def delete_import(
     import_id: int,
     db: Session = Depends(get_db),
 ):
-    imp = db.query(Import).filter(Import.id == import_id).first()
+    imp = db.get(Import, import_id)
     if not imp:
         raise HTTPException(status_code=404, detail=f"Import {import_id} not found.")
-    db.query(Transaction).filter(Transaction.import_id == import_id).delete()
+    # Transactions (and their tag links) go with it via ON DELETE CASCADE.
     db.delete(imp)
     db.commit()
 
@@ -306,25 +305,63 @@ def delete_import(
 # ─────────────────────────────────────────────────────────────────────────────
 
 
+_CSV_EXTS = frozenset({".csv"})
+_PDF_EXTS = frozenset({".pdf", ".txt"})
+
+
+def _extension(file: UploadFile) -> str:
+    return os.path.splitext(file.filename or "")[1].lower()
+
+
 def _require_csv(file: UploadFile) -> None:
-    if not (file.filename or "").lower().endswith(".csv"):
+    if _extension(file) not in _CSV_EXTS:
         raise HTTPException(status_code=400, detail="Only .csv files are accepted.")
 
 
 def _require_pdf_or_txt(file: UploadFile) -> None:
-    name = (file.filename or "").lower()
-    if not (name.endswith(".pdf") or name.endswith(".txt")):
+    if _extension(file) not in _PDF_EXTS:
         raise HTTPException(status_code=400, detail="Only .pdf and .txt files are accepted.")
 
 
+def _parse_mapping(mapping: str) -> dict:
+    """Parse and validate the mapping form field into the dict the importers take."""
+    try:
+        return ColumnMappingInput.model_validate(orjson.loads(mapping)).model_dump()
+    except orjson.JSONDecodeError as exc:
+        raise HTTPException(status_code=422, detail=f"mapping is not valid JSON: {exc}")
+    except ValidationError as exc:
+        raise HTTPException(status_code=422, detail=exc.errors())
+
+
 def _require_content(content: bytes) -> None:
     if not content:
         raise HTTPException(status_code=400, detail="Uploaded file is empty.")
 
 
-def _require_max_size(content: bytes, max_bytes: int, label: str) -> None:
-    if len(content) > max_bytes:
-        raise HTTPException(
-            status_code=413,
-            detail=f"{label} file too large (>{max_bytes // (1024*1024)} MB).",
-        )
+_READ_CHUNK = 64 * 1024
+
+
+async def _read_capped(file: UploadFile, max_bytes: int, label: str) -> tuple[bytes, str]:
+    """Read an upload in chunks, returning ``(content, sha256 hex digest)``.
+
+    Rejects with 413 once the size limit is crossed (up front when the spooled
+    upload's size is known), so no more than the cap is ever read into memory,
+    and hashes each chunk as it arrives so the importers don't rescan the bytes.
+    """
+    too_large = HTTPException(
+        status_code=413,
+        detail=f"{label} file too large (>{max_bytes // (1024*1024)} MB).",
+    )
+    if file.size is not None and file.size > max_bytes:
+        raise too_large
+
+    digest = hashlib.sha256()
+    chunks: list[bytes] = []
+    total = 0
+    while chunk := await file.read(_READ_CHUNK):
+        total += len(chunk)
+        if total > max_bytes:
+            raise too_large
+        digest.update(chunk)
+        chunks.append(chunk)
+    return b"".join(chunks), digest.hexdigest()
@@ -5,9 +5,9 @@ from typing import Optional
 from fastapi import APIRouter, Depends, HTTPException
 from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, sessionmaker
 
-from ..database import get_db
+from ..database import get_db, get_session_factory
 from ..services import llm_service
 
 router = APIRouter(prefix="/llm", tags=["llm"])
@@ -75,10 +75,12 @@ def get_settings(db: Session = Depends(get_db)):
 def update_settings(payload: LLMSettingsUpdate, db: Session = Depends(get_db)):
     if payload.provider.lower() != "ollama":
         raise HTTPException(status_code=400, detail="Only local Ollama provider is supported.")
-    llm_service.set_setting(db, "llm_provider", payload.provider)
-    llm_service.set_setting(db, "llm_model", payload.model)
-    llm_service.set_setting(db, "llm_fast_model", payload.fast_model)
-    llm_service.set_setting(db, "llm_use_fast_mode", "true" if payload.use_fast_mode else "false")
+    llm_service.set_settings_bulk(db, {
+        "llm_provider": payload.provider,
+        "llm_model": payload.model,
+        "llm_fast_model": payload.fast_model,
+        "llm_use_fast_mode": "true" if payload.use_fast_mode else "false",
+    })
     return llm_service.get_llm_settings(db)
 
 
@@ -88,15 +90,18 @@ def update_settings(payload: LLMSettingsUpdate, db: Session = Depends(get_db)):
     "/chat/stream",
     summary="Agentic chat with tool-calling; streams SSE events",
 )
-async def chat_stream(body: ChatRequest, db: Session = Depends(get_db)):
-    settings = llm_service.get_llm_settings(db)
+async def chat_stream(body: ChatRequest, session_factory: sessionmaker = Depends(get_session_factory)):
+    # The stream can run for minutes against Ollama — don't pin a pooled
+    # connection for all of it.  Sessions are opened only around DB work.
+    with session_factory() as db:
+        settings = llm_service.get_llm_settings(db)
     use_fast = body.use_fast_mode if body.use_fast_mode is not None else settings["use_fast_mode"]
     model = settings["fast_model"] if use_fast else settings["model"]
     messages = [{"role": m.role, "content": m.content} for m in body.messages]
 
     async def _stream():
         try:
-            async for event in llm_service.chat_stream(messages, model, db):
+            async for event in llm_service.chat_stream(messages, model, session_factory):
                 yield event
         except Exception as exc:
             import json
@@ -26,7 +26,7 @@ def create_alias(payload: MerchantAliasCreate, db: Session = Depends(get_db)):
     if not payload.canonical.strip():
         raise HTTPException(status_code=422, detail="canonical cannot be empty")
 
-    existing = db.query(MerchantAlias).filter(
+    existing = db.query(MerchantAlias.id).filter(
         MerchantAlias.alias == alias_lower
     ).first()
     if existing:
@@ -37,7 +37,6 @@ def create_alias(payload: MerchantAliasCreate, db: Session = Depends(get_db)):
     record = MerchantAlias(alias=alias_lower, canonical=payload.canonical.strip())
     db.add(record)
     db.commit()
-    db.refresh(record)
     return record
 
 
@@ -55,7 +54,7 @@ def update_alias(alias_id: int, payload: MerchantAliasCreate, db: Session = Depe
         raise HTTPException(status_code=422, detail="canonical cannot be empty")
 
     # Check uniqueness excluding self
-    conflict = db.query(MerchantAlias).filter(
+    conflict = db.query(MerchantAlias.id).filter(
         MerchantAlias.alias == alias_lower,
         MerchantAlias.id != alias_id,
     ).first()
@@ -67,7 +66,6 @@ def update_alias(alias_id: int, payload: MerchantAliasCreate, db: Session = Depe
     record.alias = alias_lower
     record.canonical = payload.canonical.strip()
     db.commit()
-    db.refresh(record)
     return record
 
 
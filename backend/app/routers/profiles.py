@@ -1,17 +1,31 @@
+import os
 from typing import Annotated
 
 from fastapi import APIRouter, Body, HTTPException
 
-from ..database import PROFILES_DIR, _sanitize_profile_name, init_profile_db
+from ..database import PROFILES_DIR, _sanitize_profile_name, init_profile_db, remove_profile_db
 
 router = APIRouter(prefix="/profiles", tags=["profiles"])
 
+# The UI polls the profile list; rescan the directory only when its mtime
+# moves (any file created, renamed or removed in it bumps the mtime).
+_names_cache: dict = {"mtime": None, "names": []}
+
+
+def _profile_names() -> list[str]:
+    PROFILES_DIR.mkdir(parents=True, exist_ok=True)
+    mtime = PROFILES_DIR.stat().st_mtime_ns
+    if _names_cache["mtime"] != mtime:
+        with os.scandir(PROFILES_DIR) as it:
+            names = sorted(e.name[:-3] for e in it if e.name.endswith(".db") and e.is_file())
+        _names_cache["names"] = names
+        _names_cache["mtime"] = mtime
+    return list(_names_cache["names"])
+
 
 @router.get("/")
 def list_profiles():
-    PROFILES_DIR.mkdir(parents=True, exist_ok=True)
-    names = sorted(p.stem for p in PROFILES_DIR.glob("*.db"))
-    return {"profiles": names}
+    return {"profiles": _profile_names()}
 
 
 @router.post("/", status_code=201)
@@ -29,13 +43,11 @@ def delete_profile(name: str):
     if not safe:
         raise HTTPException(status_code=400, detail="Invalid profile name")
 
-    PROFILES_DIR.mkdir(parents=True, exist_ok=True)
-    existing = list(PROFILES_DIR.glob("*.db"))
-    if len(existing) <= 1:
+    if len(_profile_names()) <= 1:
         raise HTTPException(status_code=400, detail="Cannot delete the only profile")
 
     db_file = PROFILES_DIR / f"{safe}.db"
     if not db_file.exists():
         raise HTTPException(status_code=404, detail="Profile not found")
 
-    db_file.unlink()
+    remove_profile_db(safe)
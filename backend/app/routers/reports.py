@@ -3,16 +3,17 @@
 import csv as _csv
 import io
 import re
-from collections import defaultdict
+import threading
+from collections import OrderedDict
 from typing import Optional
 
 from fastapi import APIRouter, Depends, HTTPException, Query
-from fastapi.responses import StreamingResponse
-from sqlalchemy import or_
-from sqlalchemy.orm import Session, joinedload
+from fastapi.responses import ORJSONResponse, StreamingResponse
+from sqlalchemy import column, func, text
+from sqlalchemy.orm import Session, sessionmaker
 
-from ..database import get_db, get_db_download
-from ..models import Transaction
+from ..database import data_watermark, get_db, get_download_session_factory
+from ..models import Category, Import, Transaction
 from ..services.comparer import get_period_comparison
 from ..services.reporter import (
     get_audit_flags,
@@ -133,19 +134,45 @@ _TRACKED_GROUPS: list[dict] = [
     },
 ]
 
+# Every pattern across all groups as one FTS5 query: each is a quoted phrase,
+# which the trigram tokenizer matches as a case-insensitive substring of a
+# single column.  The column filter keeps it to the fields the groups are
+# tested against below.  Trigram needs patterns of 3+ characters.
+_TRACKED_PATTERNS: list[str] = list(dict.fromkeys(p for g in _TRACKED_GROUPS for p in g["patterns"]))
+_TRACKED_MATCH = text(
+    "SELECT rowid FROM transactions_fts WHERE transactions_fts MATCH :query"
+).bindparams(
+    query="{description_raw description_norm merchant} : (%s)"
+    % " OR ".join('"{}"'.format(p.replace('"', '""')) for p in _TRACKED_PATTERNS)
+).columns(column("rowid"))
+
+# One compiled alternation per group: a row is tested with a single C-level
+# scan per group instead of one substring check per pattern.
+_TRACKED_GROUP_RES: list[re.Pattern] = [
+    re.compile("|".join(re.escape(p) for p in g["patterns"])) for g in _TRACKED_GROUPS
+]
 
-def _tx_to_dict(t: Transaction) -> dict:
-    return {
-        "id": t.id,
-        "posted_date": t.posted_date,
-        "description_raw": t.description_raw,
-        "description_norm": t.description_norm,
-        "amount": t.amount_cents / 100,
-        "currency": t.currency,
-        "merchant": t.merchant,
-        "category_id": t.category_id,
-        "category_name": t.category.name if t.category else None,
-    }
+
+# income_housing results keyed by (year, data_watermark); the watermark holds
+# the profile name, so entries are per profile.  LRU-bounded.
+_IH_CACHE: OrderedDict[tuple, dict] = OrderedDict()
+_IH_CACHE_SIZE = 8
+_IH_CACHE_LOCK = threading.Lock()
+
+
+# Response keys of a tracked-group transaction, in the column order of the
+# income_housing query; zip() stops before its trailing amount_cents.
+_TX_KEYS = (
+    "id",
+    "posted_date",
+    "description_raw",
+    "description_norm",
+    "amount",
+    "currency",
+    "merchant",
+    "category_id",
+    "category_name",
+)
 
 
 @router.get("/income-housing", summary="Tracked payee groups: income, housing, and fixed expenses")
@@ -153,38 +180,70 @@ def income_housing(
     year: Optional[str] = Query(None, description="4-digit year to filter (e.g. '2025'). Omit for all time."),
     db: Session = Depends(get_db),
 ):
-    if year and not re.match(r"^\d{4}$", year):
+    if year and not _is_year(year):
         raise HTTPException(status_code=422, detail="year must be a 4-digit year, e.g. '2025'")
 
-    def _build_query(patterns: list[str], amount_sign: str = "any"):
-        filters = or_(
-            *[
-                or_(
-                    Transaction.description_raw.ilike(f"%{p}%"),
-                    Transaction.description_norm.ilike(f"%{p}%"),
-                    Transaction.merchant.ilike(f"%{p}%"),
-                )
-                for p in patterns
-            ]
-        )
-        q = (
-            db.query(Transaction)
-            .options(joinedload(Transaction.category))
-            .filter(Transaction.transaction_type != "transfer")
-            .filter(filters)
+    # Read-mostly: serve the last result until something is committed.
+    key = (year, data_watermark(db))
+    with _IH_CACHE_LOCK:
+        if key in _IH_CACHE:
+            _IH_CACHE.move_to_end(key)
+            return _IH_CACHE[key]
+    result = _income_housing(db, year)
+    with _IH_CACHE_LOCK:
+        _IH_CACHE[key] = result
+        if len(_IH_CACHE) > _IH_CACHE_SIZE:
+            _IH_CACHE.popitem(last=False)
+    return result
+
+
+def _income_housing(db: Session, year: Optional[str]) -> dict:
+    # One query for the union of every group's patterns, served by the
+    # trigram FTS index; rows are bucketed per group below (a row can land
+    # in more than one group).  Plain columns — no ORM objects to hydrate —
+    # with amount already in dollars, so each row maps straight to a dict.
+    q = (
+        db.query(
+            Transaction.id,
+            Transaction.posted_date,
+            Transaction.description_raw,
+            Transaction.description_norm,
+            (Transaction.amount_cents / 100.0).label("amount"),
+            Transaction.currency,
+            Transaction.merchant,
+            Transaction.category_id,
+            Category.name.label("category_name"),
+            Transaction.amount_cents,
         )
-        if amount_sign == "positive":
-            q = q.filter(Transaction.amount_cents > 0)
-        elif amount_sign == "negative":
-            q = q.filter(Transaction.amount_cents < 0)
-        if year:
-            q = q.filter(Transaction.posted_date >= f"{year}-01-01")
-            q = q.filter(Transaction.posted_date <= f"{year}-12-31")
-        return q.order_by(Transaction.posted_date.desc()).all()
+        .outerjoin(Category, Transaction.category_id == Category.id)
+        .filter(Transaction.transaction_type != "transfer")
+        .filter(Transaction.id.in_(_TRACKED_MATCH))
+    )
+    if year:
+        q = q.filter(Transaction.posted_date >= f"{year}-01-01")
+        q = q.filter(Transaction.posted_date <= f"{year}-12-31")
+
+    totals = [0] * len(_TRACKED_GROUPS)
+    counts = [0] * len(_TRACKED_GROUPS)
+    rows: list[list[dict]] = [[] for _ in _TRACKED_GROUPS]
+    for t in q.order_by(Transaction.posted_date.desc()):
+        # \x01 keeps a pattern from matching across two fields.
+        hay = "\x01".join(
+            (t.description_raw or "", t.description_norm or "", t.merchant or "")
+        ).lower()
+        for i, g in enumerate(_TRACKED_GROUPS):
+            sign = g.get("amount_sign", "any")
+            if sign == "positive" and t.amount_cents <= 0:
+                continue
+            if sign == "negative" and t.amount_cents >= 0:
+                continue
+            if _TRACKED_GROUP_RES[i].search(hay):
+                totals[i] += t.amount_cents
+                counts[i] += 1
+                rows[i].append(dict(zip(_TX_KEYS, t)))
 
     groups = []
-    for g in _TRACKED_GROUPS:
-        txs = _build_query(g["patterns"], g.get("amount_sign", "any"))
+    for i, g in enumerate(_TRACKED_GROUPS):
         groups.append({
             "key": g["key"],
             "label": g["label"],
@@ -194,37 +253,54 @@ def income_housing(
             "border": g["border"],
             "positive": g["positive"],
             "amount_sign": g.get("amount_sign", "any"),
-            "total": sum(t.amount_cents for t in txs) / 100,
-            "count": len(txs),
-            "transactions": [_tx_to_dict(t) for t in txs],
+            "total": totals[i] / 100,
+            "count": counts[i],
+            "transactions": rows[i],
         })
 
     # Sum ALL positive groups for income, ALL negative groups for expenses
-    total_in = sum(g["total"] for g in groups if g["positive"])
-    total_out = sum(g["total"] for g in groups if not g["positive"])
+    # (in cents; converted to dollars only for the response).
+    in_cents = sum(totals[i] for i, g in enumerate(_TRACKED_GROUPS) if g["positive"])
+    out_cents = sum(totals[i] for i, g in enumerate(_TRACKED_GROUPS) if not g["positive"])
 
     return {
         "year": year,
         "summary": {
-            "total_income": total_in,
-            "total_tracked_expenses": abs(total_out),
-            "net": total_in + total_out,
+            "total_income": in_cents / 100,
+            "total_tracked_expenses": abs(out_cents) / 100,
+            "net": (in_cents + out_cents) / 100,
         },
         "groups": groups,
     }
 
 
-_MONTH_RE = re.compile(r"^\d{4}-\d{2}$")
-_DATE_RE = re.compile(r"^\d{4}-\d{2}(-\d{2})?$")
+def _digits(s: str) -> bool:
+    # ASCII only: str.isdigit() alone also accepts e.g. "²" and "٣".
+    return s.isascii() and s.isdigit()
+
+
+def _is_year(v: str) -> bool:
+    return len(v) == 4 and _digits(v)
+
+
+def _is_month(v: str) -> bool:
+    return len(v) == 7 and v[4] == "-" and _digits(v[:4]) and _digits(v[5:])
+
+
+def _is_date(v: str) -> bool:
+    """YYYY-MM or YYYY-MM-DD."""
+    if len(v) == 7:
+        return _is_month(v)
+    return len(v) == 10 and v[7] == "-" and _is_month(v[:7]) and _digits(v[8:])
 
 
 def _require_month(value: str, param: str) -> None:
-    if not _MONTH_RE.match(value):
+    if not _is_month(value):
         raise HTTPException(status_code=422, detail=f"{param} must be YYYY-MM, got {value!r}")
 
 
 def _require_date(value: str, param: str) -> None:
-    if not _DATE_RE.match(value):
+    if not _is_date(value):
         raise HTTPException(
             status_code=422, detail=f"{param} must be YYYY-MM or YYYY-MM-DD, got {value!r}"
         )
@@ -331,11 +407,15 @@ def compare_periods(
 ):
     for val, name in [(fromA, "fromA"), (toA, "toA"), (fromB, "fromB"), (toB, "toB")]:
         _require_date(val, name)
-    return get_period_comparison(db, fromA, toA, fromB, toB, limit_merchants)
+    # Returned as a response directly so orjson serializes the delta
+    # dataclasses itself instead of jsonable_encoder rebuilding them as dicts.
+    return ORJSONResponse(get_period_comparison(db, fromA, toA, fromB, toB, limit_merchants))
 
 
 # ── Tax-year CSV export ───────────────────────────────────────────────────────
 
+_EXPORT_CHUNK_ROWS = 1000
+
 
 @router.get(
     "/tax-export",
@@ -343,67 +423,91 @@ def compare_periods(
 )
 def tax_export(
     year: str = Query(..., description="4-digit year, e.g. '2025'"),
-    db: Session = Depends(get_db_download),
+    session_factory: sessionmaker = Depends(get_download_session_factory),
 ):
-    if not re.match(r"^\d{4}$", year):
+    if not _is_year(year):
         raise HTTPException(status_code=422, detail="year must be a 4-digit year, e.g. '2025'")
 
-    txs = (
-        db.query(Transaction)
-        .options(joinedload(Transaction.category))
-        .filter(Transaction.posted_date >= f"{year}-01-01")
-        .filter(Transaction.posted_date <= f"{year}-12-31")
-        .order_by(Transaction.posted_date)
-        .all()
-    )
-
-    # ── Build category-grouped summary ────────────────────────────────────────
-    by_category: dict[str, list] = defaultdict(list)
-    for t in txs:
-        cat = t.category.name if t.category else "Uncategorized"
-        by_category[cat].append(t)
+    def _rows():
+        # Own session: the body is produced after dependencies are torn down.
+        db = session_factory()
+        try:
+            yield from _tax_export_csv(db, year)
+        finally:
+            db.close()
 
-    output = io.StringIO()
-    writer = _csv.writer(output)
-
-    # Section 1: Summary by category
-    writer.writerow(["=== CATEGORY SUMMARY ==="])
-    writer.writerow(["Category", "Transaction Count", "Total (USD)"])
-    cat_totals = []
-    for cat, rows in sorted(by_category.items(), key=lambda x: sum(r.amount_cents for r in x[1])):
-        total = sum(r.amount_cents for r in rows) / 100
-        cat_totals.append((cat, len(rows), total))
-        writer.writerow([cat, len(rows), f"{total:.2f}"])
-
-    income_total = sum(t for _, _, t in cat_totals if t > 0)
-    expense_total = sum(t for _, _, t in cat_totals if t < 0)
-    writer.writerow([])
-    writer.writerow(["Total Income", "", f"{income_total:.2f}"])
-    writer.writerow(["Total Expenses", "", f"{expense_total:.2f}"])
-    writer.writerow(["Net", "", f"{income_total + expense_total:.2f}"])
-    writer.writerow([])
-
-    # Section 2: All transactions
-    writer.writerow(["=== ALL TRANSACTIONS ==="])
-    writer.writerow(["Date", "Description", "Merchant", "Amount (USD)", "Category", "Account"])
-    for t in txs:
-        from ..models import Import  # local to avoid circular at module load
-        imp = db.query(Import).filter(Import.id == t.import_id).first()
-        account = imp.account_label if imp and imp.account_label else (imp.filename if imp else "")
-        cat = t.category.name if t.category else "Uncategorized"
-        writer.writerow([
-            t.posted_date,
-            t.description_raw,
-            t.merchant or "",
-            f"{t.amount_cents / 100:.2f}",
-            cat,
-            account,
-        ])
-
-    output.seek(0)
     filename = f"transactions_{year}.csv"
     return StreamingResponse(
-        iter([output.getvalue()]),
+        _rows(),
         media_type="text/csv",
         headers={"Content-Disposition": f'attachment; filename="{filename}"'},
     )
+
+
+def _tax_export_csv(db: Session, year: str):
+    """Yield the tax export in chunks; transactions are streamed, never all held at once."""
+    in_year = (
+        Transaction.posted_date >= f"{year}-01-01",
+        Transaction.posted_date <= f"{year}-12-31",
+    )
+    cat_name = func.coalesce(Category.name, "Uncategorized")
+    buf = io.StringIO()
+    writer = _csv.writer(buf)
+
+    def drain() -> str:
+        out = buf.getvalue()
+        buf.seek(0)
+        buf.truncate(0)
+        return out
+
+    # ── Section 1: Summary by category — aggregated in SQL ────────────────────
+    totals = (
+        db.query(cat_name, func.count(Transaction.id), func.sum(Transaction.amount_cents))
+        .outerjoin(Category, Transaction.category_id == Category.id)
+        .filter(*in_year)
+        .group_by(cat_name)
+        .order_by(func.sum(Transaction.amount_cents))
+        .all()
+    )
+    writer.writerow(["=== CATEGORY SUMMARY ==="])
+    writer.writerow(["Category", "Transaction Count", "Total (USD)"])
+    writer.writerows((cat, count, f"{cents / 100:.2f}") for cat, count, cents in totals)
+
+    # Integer cents throughout; dollars only when formatting.
+    income_cents = sum(cents for _, _, cents in totals if cents > 0)
+    expense_cents = sum(cents for _, _, cents in totals if cents < 0)
+    writer.writerows([
+        [],
+        ["Total Income", "", f"{income_cents / 100:.2f}"],
+        ["Total Expenses", "", f"{expense_cents / 100:.2f}"],
+        ["Net", "", f"{(income_cents + expense_cents) / 100:.2f}"],
+        [],
+        # Section 2: All transactions
+        ["=== ALL TRANSACTIONS ==="],
+        ["Date", "Description", "Merchant", "Amount (USD)", "Category", "Account"],
+    ])
+    yield drain()
+
+    # ── Section 2: plain column rows, fetched and written per 1k-row batch ────
+    rows = (
+        db.query(
+            Transaction.posted_date,
+            Transaction.description_raw,
+            Transaction.merchant,
+            Transaction.amount_cents,
+            cat_name,
+            Import.account_label,
+            Import.filename,
+        )
+        .outerjoin(Category, Transaction.category_id == Category.id)
+        .outerjoin(Import, Transaction.import_id == Import.id)
+        .filter(*in_year)
+        .order_by(Transaction.posted_date)
+    )
+    result = db.execute(rows.statement, execution_options={"yield_per": _EXPORT_CHUNK_ROWS})
+    for batch in result.partitions():
+        writer.writerows(
+            (posted_date, description_raw, merchant or "", f"{cents / 100:.2f}", cat, label or filename or "")
+            for posted_date, description_raw, merchant, cents, cat, label, filename in batch
+        )
+        yield drain()
@@ -1,8 +1,10 @@
+import functools
 import re
 from collections import defaultdict
 
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session, joinedload
+from sqlalchemy import and_, case, func, or_
+from sqlalchemy.orm import Session, selectinload
 
 from ..database import get_db
 from ..models import Category, Rule, Transaction
@@ -32,7 +34,7 @@ def _to_schema(rule: Rule) -> RuleSchema:
 def list_rules(db: Session = Depends(get_db)):
     rules = (
         db.query(Rule)
-        .options(joinedload(Rule.category))
+        .options(selectinload(Rule.category))
         .order_by(Rule.priority.desc(), Rule.id.asc())
         .all()
     )
@@ -42,13 +44,12 @@ def list_rules(db: Session = Depends(get_db)):
 @router.post("/", response_model=RuleSchema, status_code=201, summary="Create a rule")
 def create_rule(payload: RuleCreate, db: Session = Depends(get_db)):
     _validate_pattern(payload.pattern, payload.match_type)
-    _require_category(db, payload.category_id)
+    category = _get_category_or_422(db, payload.category_id)
     rule = Rule(**payload.model_dump())
+    # Set from the row just checked, so the response needs no reload.
+    rule.category = category
     db.add(rule)
     db.commit()
-    db.refresh(rule)
-    # Reload with category joined
-    rule = db.query(Rule).options(joinedload(Rule.category)).filter(Rule.id == rule.id).first()
     return _to_schema(rule)
 
 
@@ -56,11 +57,11 @@ def create_rule(payload: RuleCreate, db: Session = Depends(get_db)):
 def update_rule(rule_id: int, payload: RuleUpdate, db: Session = Depends(get_db)):
     rule = _get_or_404(db, rule_id)
     _validate_pattern(payload.pattern, payload.match_type)
-    _require_category(db, payload.category_id)
+    category = _get_category_or_422(db, payload.category_id)
     for field, val in payload.model_dump().items():
         setattr(rule, field, val)
+    rule.category = category
     db.commit()
-    rule = db.query(Rule).options(joinedload(Rule.category)).filter(Rule.id == rule_id).first()
     return _to_schema(rule)
 
 
@@ -69,7 +70,7 @@ def delete_rule(rule_id: int, db: Session = Depends(get_db)):
     rule = _get_or_404(db, rule_id)
     # Clear rule reference on any transactions that used this rule for provenance
     db.query(Transaction).filter(Transaction.category_rule_id == rule_id).update(
-        {"category_rule_id": None, "category_source": "uncategorized"}, synchronize_session="fetch"
+        {"category_rule_id": None, "category_source": "uncategorized"}, synchronize_session=False
     )
     db.delete(rule)
     db.commit()
@@ -84,49 +85,100 @@ def apply_rules(db: Session = Depends(get_db)):
     return apply_rules_to_all(db)
 
 
-_EXCLUDED_TYPES = {"transfer", "payment"}
+_EXCLUDED_TYPES = ("transfer", "payment")
+
+
+def _avg_cents(total_cents: int, count: int) -> int:
+    """Mean of a non-negative cents total, rounded half-up, in integer math."""
+    return (2 * total_cents + count) // (2 * count)
 
 
 @router.get("/suggestions", summary="Suggest categorization rules based on transaction patterns")
 def get_rule_suggestions(db: Session = Depends(get_db)):
     # ── Pre-compute existing rule patterns so we don't suggest duplicates ─────
-    existing_rules = db.query(Rule).filter(Rule.is_active.is_(True)).all()
+    existing_rules = db.query(Rule.pattern, Rule.match_type).filter(Rule.is_active.is_(True)).all()
     # A merchant is "already covered" if its lowercase name is a substring of
     # any existing contains/exact rule pattern, or matches a regex rule.
+    # Patterns are lowered / compiled once here rather than per merchant, and
+    # the contains rules collapse into two C-level scans per merchant.
+    contains_pats: list[str] = []
+    exact_pats: set[str] = set()
+    regexes: list[re.Pattern] = []
+    for pattern, match_type in existing_rules:
+        if match_type == "contains":
+            contains_pats.append(pattern.lower())
+        elif match_type == "exact":
+            exact_pats.add(pattern.lower())
+        elif match_type == "regex":
+            try:
+                regexes.append(re.compile(pattern, re.IGNORECASE))
+            except re.error:
+                pass
+    # "pat in merchant" for any pat: one alternation of the escaped patterns.
+    contains_re = re.compile("|".join(map(re.escape, contains_pats))) if contains_pats else None
+    # "merchant in pat" for any pat: the merchant holds no NUL, so it can't
+    # match across the separators of the joined patterns.
+    contains_blob = "\0".join(contains_pats)
+
+    # Memoized for this request's rule snapshot: merchants seen by both
+    # heuristics below are checked once.
+    @functools.lru_cache(maxsize=None)
     def _already_covered(merchant_lower: str) -> bool:
-        for r in existing_rules:
-            pat = r.pattern.lower()
-            if r.match_type == "contains" and (pat in merchant_lower or merchant_lower in pat):
-                return True
-            if r.match_type == "exact" and pat == merchant_lower:
-                return True
-            if r.match_type == "regex":
-                try:
-                    if re.search(r.pattern, merchant_lower, re.IGNORECASE):
-                        return True
-                except re.error:
-                    pass
-        return False
+        if merchant_lower in exact_pats:
+            return True
+        if contains_re is not None and (
+            contains_re.search(merchant_lower) or merchant_lower in contains_blob
+        ):
+            return True
+        return any(rx.search(merchant_lower) for rx in regexes)
 
     # ── Heuristic 1: Uncategorized volume ─────────────────────────────────────
+    # Grouped and aggregated in SQL; merchants an active contains/exact rule
+    # already covers are dropped there by an anti-join, so only the rest
+    # (and their regex check) reach Python.
+    merchant_key = func.trim(
+        func.coalesce(func.nullif(Transaction.merchant_canonical, ""), Transaction.merchant, "")
+    )
+    key_lower = func.lower(merchant_key)
+    pat_lower = func.lower(Rule.pattern)
+    covered = (
+        db.query(Rule.id)
+        .filter(Rule.is_active.is_(True))
+        .filter(
+            or_(
+                and_(
+                    Rule.match_type == "contains",
+                    or_(func.instr(key_lower, pat_lower) > 0, func.instr(pat_lower, key_lower) > 0),
+                ),
+                and_(Rule.match_type == "exact", pat_lower == key_lower),
+            )
+        )
+        .exists()
+    )
     uncategorized = (
         db.query(Transaction)
         .filter(Transaction.category_id.is_(None))
-        .filter(Transaction.transaction_type.notin_(list(_EXCLUDED_TYPES)))
+        .filter(Transaction.transaction_type.notin_(_EXCLUDED_TYPES))
+    )
+    merch_uncat = (
+        uncategorized.with_entities(
+            merchant_key,
+            func.count(Transaction.id),
+            func.sum(case((Transaction.amount_cents < 0, Transaction.amount_cents), else_=0)),
+        )
+        .group_by(merchant_key)
+        .having(merchant_key != "")
+        .having(~covered)
+        .order_by(func.min(Transaction.id))
         .all()
     )
-    merch_uncat: dict[str, list[Transaction]] = defaultdict(list)
-    for tx in uncategorized:
-        key = (tx.merchant_canonical or tx.merchant or "").strip()
-        if key:
-            merch_uncat[key].append(tx)
 
     # ── Heuristic 2: Manual consistency ───────────────────────────────────────
     manual_txns = (
         db.query(Transaction)
-        .options(joinedload(Transaction.category))
+        .options(selectinload(Transaction.category))
         .filter(Transaction.category_source == "manual")
-        .filter(Transaction.transaction_type.notin_(list(_EXCLUDED_TYPES)))
+        .filter(Transaction.transaction_type.notin_(_EXCLUDED_TYPES))
         .all()
     )
     manual_groups: dict[str, dict[int, list[Transaction]]] = defaultdict(lambda: defaultdict(list))
@@ -147,7 +199,7 @@ def get_rule_suggestions(db: Session = Depends(get_db)):
         consistency = len(dom_txns) / total_by_merch if total_by_merch else 0
         if len(dom_txns) >= 2 and consistency >= 0.75:
             cat = dom_txns[0].category
-            spend = sum(t.amount_cents for t in dom_txns if t.amount_cents < 0) / 100
+            spend_cents = -sum(t.amount_cents for t in dom_txns if t.amount_cents < 0)
             suggestions.append({
                 "merchant": merchant,
                 "match_type": "contains",
@@ -155,8 +207,8 @@ def get_rule_suggestions(db: Session = Depends(get_db)):
                 "category_id": dom_cat_id,
                 "category_name": cat.name if cat else None,
                 "count": len(dom_txns),
-                "total_spend": round(abs(spend), 2),
-                "avg_spend": round(abs(spend / len(dom_txns)), 2) if dom_txns else 0,
+                "total_spend": spend_cents / 100,
+                "avg_spend": _avg_cents(spend_cents, len(dom_txns)) / 100 if dom_txns else 0,
                 "confidence": min(95, int(consistency * 100)),
                 "source": "manual_consistency",
                 "sample_descriptions": [t.description_raw[:80] for t in dom_txns[:3]],
@@ -164,11 +216,9 @@ def get_rule_suggestions(db: Session = Depends(get_db)):
             seen.add(merchant)
 
     # Uncategorized-volume suggestions (need category assignment in UI)
-    for merchant, txns in merch_uncat.items():
+    for merchant, count, spend_cents in merch_uncat:
         if merchant in seen or _already_covered(merchant.lower()):
             continue
-        spend = sum(t.amount_cents for t in txns if t.amount_cents < 0) / 100
-        count = len(txns)
         suggestions.append({
             "merchant": merchant,
             "match_type": "contains",
@@ -176,15 +226,34 @@ def get_rule_suggestions(db: Session = Depends(get_db)):
             "category_id": None,
             "category_name": None,
             "count": count,
-            "total_spend": round(abs(spend), 2),
-            "avg_spend": round(abs(spend / count), 2) if count else 0,
+            "total_spend": abs(spend_cents) / 100,
+            "avg_spend": _avg_cents(abs(spend_cents), count) / 100 if count else 0,
             "confidence": min(85, 40 + count * 5),
             "source": "uncategorized_volume",
-            "sample_descriptions": [t.description_raw[:80] for t in txns[:3]],
+            "sample_descriptions": [],
         })
 
     suggestions.sort(key=lambda x: (0 if x["category_id"] else 1, -x["count"]))
-    return {"suggestions": suggestions[:50]}
+    suggestions = suggestions[:50]
+
+    # Sample descriptions only for the uncategorized merchants that made the cut.
+    wanted = {sug["merchant"]: sug for sug in suggestions if sug["source"] == "uncategorized_volume"}
+    if wanted:
+        rn = func.row_number().over(partition_by=merchant_key, order_by=Transaction.id).label("rn")
+        ranked = (
+            uncategorized.with_entities(merchant_key.label("merchant"), Transaction.description_raw, rn)
+            .filter(merchant_key.in_(wanted))
+            .subquery()
+        )
+        samples = (
+            db.query(ranked.c.merchant, ranked.c.description_raw)
+            .filter(ranked.c.rn <= 3)
+            .order_by(ranked.c.rn)
+        )
+        for merchant, desc in samples:
+            wanted[merchant]["sample_descriptions"].append(desc[:80])
+
+    return {"suggestions": suggestions}
 
 
 @router.post(
@@ -193,7 +262,7 @@ def get_rule_suggestions(db: Session = Depends(get_db)):
     summary="Create a rule from a suggestion and apply it to matching uncategorized transactions",
 )
 def apply_rule_suggestion(payload: ApplySuggestionRequest, db: Session = Depends(get_db)):
-    _require_category(db, payload.category_id)
+    _get_category_or_422(db, payload.category_id)
     _validate_pattern(payload.pattern, payload.match_type)
     rule = Rule(
         pattern=payload.pattern,
@@ -206,35 +275,36 @@ def apply_rule_suggestion(payload: ApplySuggestionRequest, db: Session = Depends
     db.flush()
 
     # Apply to uncategorized transactions that match
-    txns = (
+    candidates = (
         db.query(Transaction)
         .filter(Transaction.category_id.is_(None))
-        .filter(Transaction.transaction_type.notin_(list(_EXCLUDED_TYPES)))
-        .all()
+        .filter(Transaction.transaction_type.notin_(_EXCLUDED_TYPES))
     )
-    updated = 0
-    for tx in txns:
-        if _rule_matches(payload.pattern, payload.match_type, tx.description_norm):
-            tx.category_id = payload.category_id
-            tx.category_source = "rule"
-            tx.category_rule_id = rule.id
-            updated += 1
+    values = {"category_id": payload.category_id, "category_source": "rule", "category_rule_id": rule.id}
+    # description_norm is stored lowercased, so every match type runs as one
+    # UPDATE in SQL (instr, not LIKE, so % and _ in a pattern stay literal).
+    pat = payload.pattern.lower()
+    if payload.match_type == "contains":
+        updated = candidates.filter(func.instr(Transaction.description_norm, pat) > 0).update(
+            values, synchronize_session=False
+        )
+    elif payload.match_type == "exact":
+        updated = candidates.filter(Transaction.description_norm == pat).update(
+            values, synchronize_session=False
+        )
+    elif payload.match_type == "regex":
+        # REGEXP is backed by Python's re (SQLAlchemy registers it on pysqlite
+        # connections); _validate_pattern has already compiled the pattern.
+        updated = candidates.filter(
+            Transaction.description_norm.regexp_match(f"(?i){payload.pattern}")
+        ).update(values, synchronize_session=False)
+    else:
+        updated = 0
     db.commit()
     return ApplySuggestionResponse(created_rule_id=rule.id, updated_transactions_count=updated)
 
 
-def _rule_matches(pattern: str, match_type: str, description_norm: str) -> bool:
-    text = (description_norm or "").lower()
-    if match_type == "contains":
-        return pattern.lower() in text
-    if match_type == "exact":
-        return pattern.lower() == text
-    if match_type == "regex":
-        try:
-            return bool(re.search(pattern, text, re.IGNORECASE))
-        except re.error:
-            return False
-    return False
+_NESTED_QUANTIFIER_RE = re.compile(r"\([^)]*[*+][^)]*\)[*+]")
 
 
 def _validate_pattern(pattern: str, match_type: str) -> None:
@@ -243,7 +313,7 @@ def _validate_pattern(pattern: str, match_type: str) -> None:
         raise HTTPException(status_code=422, detail="Pattern too long (max 200 chars).")
     if match_type == "regex":
         # Disallow nested quantifiers like (.+)+ or (.*){2,} which can backtrack catastrophically.
-        if re.search(r"\([^)]*[*+][^)]*\)[*+]", pattern):
+        if _NESTED_QUANTIFIER_RE.search(pattern):
             raise HTTPException(status_code=422, detail="Regex pattern too complex; avoid nested quantifiers.")
         try:
             re.compile(pattern, re.IGNORECASE)
@@ -255,12 +325,14 @@ def _validate_pattern(pattern: str, match_type: str) -> None:
 
 
 def _get_or_404(db: Session, rule_id: int) -> Rule:
-    rule = db.query(Rule).filter(Rule.id == rule_id).first()
+    rule = db.get(Rule, rule_id)
     if not rule:
         raise HTTPException(status_code=404, detail="Rule not found.")
     return rule
 
 
-def _require_category(db: Session, cat_id: int) -> None:
-    if not db.query(Category).filter(Category.id == cat_id).first():
+def _get_category_or_422(db: Session, cat_id: int) -> Category:
+    category = db.get(Category, cat_id)
+    if not category:
         raise HTTPException(status_code=422, detail=f"Category id={cat_id} does not exist.")
+    return category
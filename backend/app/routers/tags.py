@@ -32,7 +32,6 @@ def create_tag(payload: TagCreate, db: Session = Depends(get_db)):
     tag = Tag(name=name, color=payload.color or None)
     db.add(tag)
     db.commit()
-    db.refresh(tag)
     return tag
 
 
@@ -54,7 +53,6 @@ def update_tag(tag_id: int, payload: TagUpdate, db: Session = Depends(get_db)):
     if "color" in payload.model_fields_set:
         tag.color = payload.color or None
     db.commit()
-    db.refresh(tag)
     return tag
 
 
@@ -1,14 +1,15 @@
 import csv as _csv
 import io
+from datetime import date
 from typing import Optional
 
 from fastapi import APIRouter, Depends, HTTPException, Query
 from fastapi.responses import StreamingResponse
-from sqlalchemy import or_
-from sqlalchemy.orm import Session, joinedload, selectinload
+from sqlalchemy import column, text, tuple_
+from sqlalchemy.orm import Session, selectinload, sessionmaker
 
-from ..database import get_db, get_db_download
-from ..models import Import, Tag, Transaction, transaction_tags
+from ..database import get_db, get_download_session_factory
+from ..models import Category, Import, Rule, Tag, Transaction, transaction_tags
 from ..schemas import (
     PatchTransactionCategory,
     PatchTransactionNote,
@@ -21,9 +22,12 @@ from ..schemas import (
 router = APIRouter(prefix="/transactions", tags=["transactions"])
 
 
-def _tx_to_schema(tx: Transaction, tags: list | None = None) -> TransactionSchema:
-    rule = tx.category_rule
-    return TransactionSchema(
+def _tx_to_schema(tx: Transaction, category, rule, tags: list | None = None) -> TransactionSchema:
+    """``category`` / ``rule`` need only the display attributes read below:
+    the related ORM objects, or the plain rows the list endpoint looks up."""
+    # Built from a loaded ORM row, so field validation is skipped; up to 500
+    # of these are made per list page.
+    return TransactionSchema.model_construct(
         id=tx.id,
         import_id=tx.import_id,
         posted_date=tx.posted_date,
@@ -34,9 +38,9 @@ def _tx_to_schema(tx: Transaction, tags: list | None = None) -> TransactionSchem
         merchant=tx.merchant,
         merchant_canonical=tx.merchant_canonical,
         category_id=tx.category_id,
-        category_name=tx.category.name if tx.category else None,
-        category_color=tx.category.color if tx.category else None,
-        category_icon=tx.category.icon if tx.category else None,
+        category_name=category.name if category else None,
+        category_color=category.color if category else None,
+        category_icon=category.icon if category else None,
         fingerprint_hash=tx.fingerprint_hash,
         transaction_type=tx.transaction_type,
         note=tx.note,
@@ -50,13 +54,56 @@ def _tx_to_schema(tx: Transaction, tags: list | None = None) -> TransactionSchem
     )
 
 
+# Substring match on either merchant column through the trigram FTS table,
+# which serves LIKE from its index.  A UNION rather than an OR: FTS5 can only
+# use the index for one LIKE per scan.  LIKE there is case-insensitive.
+_MERCHANT_MATCH = text(
+    "SELECT rowid FROM transactions_fts WHERE merchant LIKE :pattern "
+    "UNION SELECT rowid FROM transactions_fts WHERE merchant_canonical LIKE :pattern"
+).columns(column("rowid"))
+
+
+def _merchant_match(search: str):
+    return _MERCHANT_MATCH.bindparams(pattern=f"%{search}%")
+
+
 def _base_query(db: Session):
+    # Every Transaction column is serialised, but only the display fields of
+    # the related category and rule are, so those loads are narrowed.
     return db.query(Transaction).options(
-        joinedload(Transaction.category),
-        joinedload(Transaction.category_rule),
+        selectinload(Transaction.category).load_only(Category.name, Category.color, Category.icon),
+        selectinload(Transaction.category_rule).load_only(Rule.pattern, Rule.match_type, Rule.priority),
     )
 
 
+def _apply_common_filters(
+    query,
+    *,
+    import_id: Optional[int],
+    category_id: Optional[int],
+    uncategorized: bool,
+    from_date: Optional[date],
+    to_date: Optional[date],
+    merchant_search: Optional[str],
+):
+    """Filters shared by the list and CSV export endpoints."""
+    if import_id is not None:
+        query = query.filter(Transaction.import_id == import_id)
+    if uncategorized:
+        query = query.filter(Transaction.category_id == None)  # noqa: E711
+    elif category_id is not None:
+        query = query.filter(Transaction.category_id == category_id)
+    # posted_date is stored as ISO-8601 text, so ISO strings compare in date
+    # order and keep the range on the index.
+    if from_date is not None:
+        query = query.filter(Transaction.posted_date >= from_date.isoformat())
+    if to_date is not None:
+        query = query.filter(Transaction.posted_date <= to_date.isoformat())
+    if merchant_search:
+        query = query.filter(Transaction.id.in_(_merchant_match(merchant_search)))
+    return query
+
+
 @router.get("/", response_model=TransactionListResponse, summary="List transactions")
 def list_transactions(
     limit: int = Query(default=50, ge=1, le=500),
@@ -64,56 +111,107 @@ def list_transactions(
     import_id: Optional[int] = Query(default=None, description="Filter by import ID"),
     category_id: Optional[int] = Query(default=None, description="Filter by category ID"),
     uncategorized: bool = Query(default=False, description="Return only uncategorized rows"),
-    from_date: Optional[str] = Query(default=None, description="Filter from date (YYYY-MM-DD)"),
-    to_date: Optional[str] = Query(default=None, description="Filter to date (YYYY-MM-DD)"),
+    from_date: Optional[date] = Query(default=None, description="Filter from date (YYYY-MM-DD)"),
+    to_date: Optional[date] = Query(default=None, description="Filter to date (YYYY-MM-DD)"),
     merchant_search: Optional[str] = Query(default=None, description="Filter by merchant name (partial match)"),
     tag_id: Optional[int] = Query(default=None, description="Filter by tag ID (any match)"),
     include_tags: bool = Query(default=False, description="Include tags list per row (adds one DB query)"),
+    after_posted_date: Optional[date] = Query(
+        default=None, description="Keyset cursor: posted_date of the last row already seen"
+    ),
+    after_id: Optional[int] = Query(default=None, description="Keyset cursor: id of the last row already seen"),
     db: Session = Depends(get_db),
 ):
-    query = _base_query(db)
-
-    if import_id is not None:
-        query = query.filter(Transaction.import_id == import_id)
-    if uncategorized:
-        query = query.filter(Transaction.category_id == None)  # noqa: E711
-    elif category_id is not None:
-        query = query.filter(Transaction.category_id == category_id)
-    if from_date is not None:
-        query = query.filter(Transaction.posted_date >= from_date)
-    if to_date is not None:
-        query = query.filter(Transaction.posted_date <= to_date)
-    if merchant_search:
-        pat = f"%{merchant_search}%"
-        query = query.filter(
-            or_(Transaction.merchant_canonical.ilike(pat), Transaction.merchant.ilike(pat))
+    cursor = after_posted_date is not None or after_id is not None
+    if cursor and (after_posted_date is None or after_id is None):
+        raise HTTPException(
+            status_code=422, detail="after_posted_date and after_id must be given together."
         )
+    if cursor and offset:
+        raise HTTPException(status_code=422, detail="offset cannot be combined with a keyset cursor.")
+
+    query = _apply_common_filters(
+        db.query(Transaction),
+        import_id=import_id,
+        category_id=category_id,
+        uncategorized=uncategorized,
+        from_date=from_date,
+        to_date=to_date,
+        merchant_search=merchant_search,
+    )
     if tag_id is not None:
-        query = query.filter(
-            Transaction.id.in_(
-                db.query(transaction_tags.c.transaction_id).filter(
-                    transaction_tags.c.tag_id == tag_id
-                )
-            )
-        )
+        # (transaction_id, tag_id) is the link table's primary key, so the
+        # join yields each transaction at most once.
+        query = query.join(
+            transaction_tags, transaction_tags.c.transaction_id == Transaction.id
+        ).filter(transaction_tags.c.tag_id == tag_id)
 
     if include_tags:
         query = query.options(selectinload(Transaction.tags))
 
+    # total always covers the whole filtered set, cursor or not.  Kept as its
+    # own COUNT: a window count on the page query would make SQLite sort every
+    # filtered row instead of walking idx_transactions_posted_date for one page.
     total = query.count()
-    items = (
-        query.order_by(Transaction.posted_date.desc(), Transaction.id.desc())
-        .offset(offset)
-        .limit(limit)
-        .all()
+    query = query.order_by(Transaction.posted_date.desc(), Transaction.id.desc())
+    if cursor:
+        # The cursor replaces OFFSET: seek straight past the last row seen.
+        query = query.filter(
+            tuple_(Transaction.posted_date, Transaction.id) < (after_posted_date.isoformat(), after_id)
+        )
+    else:
+        query = query.offset(offset)
+    items = query.limit(limit).all()
+
+    # The page references a handful of categories and rules; their display
+    # columns are fetched once as plain rows rather than hydrated onto every
+    # transaction through the relationships.
+    cat_ids = {tx.category_id for tx in items if tx.category_id is not None}
+    rule_ids = {tx.category_rule_id for tx in items if tx.category_rule_id is not None}
+    categories = (
+        {
+            row.id: row
+            for row in db.query(Category.id, Category.name, Category.color, Category.icon).filter(
+                Category.id.in_(cat_ids)
+            )
+        }
+        if cat_ids
+        else {}
+    )
+    rules = (
+        {
+            row.id: row
+            for row in db.query(Rule.id, Rule.pattern, Rule.match_type, Rule.priority).filter(
+                Rule.id.in_(rule_ids)
+            )
+        }
+        if rule_ids
+        else {}
     )
 
     def _tags_for(tx: Transaction) -> list:
         if not include_tags:
             return []
-        return [TagSchema(id=t.id, name=t.name, color=t.color, created_at=t.created_at) for t in tx.tags]
+        return [
+            TagSchema.model_construct(id=t.id, name=t.name, color=t.color, created_at=t.created_at)
+            for t in tx.tags
+        ]
+
+    return {
+        "total": total,
+        "items": [
+            _tx_to_schema(
+                tx,
+                categories.get(tx.category_id),
+                rules.get(tx.category_rule_id),
+                tags=_tags_for(tx),
+            )
+            for tx in items
+        ],
+    }
 
-    return {"total": total, "items": [_tx_to_schema(tx, tags=_tags_for(tx)) for tx in items]}
+
+_EXPORT_CHUNK_ROWS = 1000
 
 
 @router.get("/export", summary="Export filtered transactions as CSV")
@@ -121,48 +219,73 @@ def export_transactions_csv(
     import_id: Optional[int] = Query(default=None),
     category_id: Optional[int] = Query(default=None),
     uncategorized: bool = Query(default=False),
-    from_date: Optional[str] = Query(default=None),
-    to_date: Optional[str] = Query(default=None),
+    from_date: Optional[date] = Query(default=None),
+    to_date: Optional[date] = Query(default=None),
     merchant_search: Optional[str] = Query(default=None),
-    db: Session = Depends(get_db_download),
+    session_factory: sessionmaker = Depends(get_download_session_factory),
 ):
-    query = _base_query(db)
-    if import_id is not None:
-        query = query.filter(Transaction.import_id == import_id)
-    if uncategorized:
-        query = query.filter(Transaction.category_id == None)  # noqa: E711
-    elif category_id is not None:
-        query = query.filter(Transaction.category_id == category_id)
-    if from_date is not None:
-        query = query.filter(Transaction.posted_date >= from_date)
-    if to_date is not None:
-        query = query.filter(Transaction.posted_date <= to_date)
-    if merchant_search:
-        pat = f"%{merchant_search}%"
-        query = query.filter(
-            or_(Transaction.merchant_canonical.ilike(pat), Transaction.merchant.ilike(pat))
-        )
-    txns = query.order_by(Transaction.posted_date.desc(), Transaction.id.desc()).all()
-
-    output = io.StringIO()
-    writer = _csv.writer(output)
-    writer.writerow(["Date", "Description", "Merchant", "Amount", "Category", "Account", "Note"])
-    for tx in txns:
-        imp = db.query(Import).filter(Import.id == tx.import_id).first()
-        account = imp.account_label if imp and imp.account_label else (imp.filename if imp else "")
-        cat = tx.category.name if tx.category else ""
-        writer.writerow([
-            tx.posted_date,
-            tx.description_raw,
-            tx.merchant or "",
-            f"{tx.amount_cents / 100:.2f}",
-            cat,
-            account,
-            tx.note or "",
-        ])
-    output.seek(0)
+    def _rows():
+        # Own session: the body is produced after dependencies are torn down.
+        db = session_factory()
+        try:
+            query = (
+                db.query(
+                    Transaction.posted_date,
+                    Transaction.description_raw,
+                    Transaction.merchant,
+                    Transaction.amount_cents,
+                    Category.name,
+                    Import.account_label,
+                    Import.filename,
+                    Transaction.note,
+                )
+                .outerjoin(Category, Transaction.category_id == Category.id)
+                .outerjoin(Import, Transaction.import_id == Import.id)
+            )
+            query = _apply_common_filters(
+                query,
+                import_id=import_id,
+                category_id=category_id,
+                uncategorized=uncategorized,
+                from_date=from_date,
+                to_date=to_date,
+                merchant_search=merchant_search,
+            )
+            query = query.order_by(Transaction.posted_date.desc(), Transaction.id.desc())
+
+            # One reusable buffer; each 1k-row batch goes through a single
+            # writerows() call and is drained to the client.
+            buf = io.StringIO()
+            writer = _csv.writer(buf)
+
+            def drain() -> str:
+                out = buf.getvalue()
+                buf.seek(0)
+                buf.truncate(0)
+                return out
+
+            writer.writerow(["Date", "Description", "Merchant", "Amount", "Category", "Account", "Note"])
+            yield drain()
+            result = db.execute(query.statement, execution_options={"yield_per": _EXPORT_CHUNK_ROWS})
+            for batch in result.partitions():
+                writer.writerows(
+                    (
+                        posted_date,
+                        desc,
+                        merchant or "",
+                        f"{cents / 100:.2f}",
+                        cat or "",
+                        label or filename or "",
+                        note or "",
+                    )
+                    for posted_date, desc, merchant, cents, cat, label, filename, note in batch
+                )
+                yield drain()
+        finally:
+            db.close()
+
     return StreamingResponse(
-        iter([output.getvalue()]),
+        _rows(),
         media_type="text/csv",
         headers={"Content-Disposition": 'attachment; filename="transactions_export.csv"'},
     )
@@ -174,24 +297,28 @@ def patch_category(tx_id: int, body: PatchTransactionCategory, db: Session = Dep
     tx = db.get(Transaction, tx_id)
     if not tx:
         raise HTTPException(status_code=404, detail="Transaction not found")
-    tx.category_id = body.category_id
-    tx.category_source = "manual" if body.category_id is not None else "uncategorized"
-    tx.category_rule_id = None
+    category = None
+    if body.category_id is not None:
+        category = db.get(Category, body.category_id)
+        if category is None:
+            raise HTTPException(status_code=422, detail="Category not found")
+    # Set through the relationships, so the response needs no reload.
+    tx.category = category
+    tx.category_source = "manual" if category is not None else "uncategorized"
+    tx.category_rule = None
     db.commit()
-    # Reload with joins for the response
-    tx = _base_query(db).filter(Transaction.id == tx_id).first()
-    return _tx_to_schema(tx)
+    return _tx_to_schema(tx, tx.category, tx.category_rule)
 
 
 @router.patch("/{tx_id}/note", response_model=TransactionSchema, summary="Set or clear a note on a transaction")
 def patch_note(tx_id: int, body: PatchTransactionNote, db: Session = Depends(get_db)):
-    tx = db.get(Transaction, tx_id)
+    # Loaded with its category and rule up front; a note edit leaves both as is.
+    tx = _base_query(db).filter(Transaction.id == tx_id).first()
     if not tx:
         raise HTTPException(status_code=404, detail="Transaction not found")
     tx.note = body.note
     db.commit()
-    tx = _base_query(db).filter(Transaction.id == tx_id).first()
-    return _tx_to_schema(tx)
+    return _tx_to_schema(tx, tx.category, tx.category_rule)
 
 
 @router.delete("/{tx_id}", status_code=204, summary="Permanently delete a transaction")
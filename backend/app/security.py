@@ -1,8 +1,28 @@
+import functools
+import hmac
+import ipaddress
 import os
+
 from fastapi import Depends, HTTPException, Request, status
 
 # Bearer token used for all API requests when set.
 API_TOKEN = os.getenv("DIGITALSOV_API_TOKEN")
+_API_TOKEN_BYTES = API_TOKEN.encode() if API_TOKEN else b""
+
+_BEARER_PREFIX = "Bearer "
+
+
+@functools.lru_cache(maxsize=256)
+def _is_loopback(host: str) -> bool:
+    """True for "localhost" and any loopback address, IPv4-mapped included."""
+    if host == "localhost":
+        return True
+    try:
+        addr = ipaddress.ip_address(host)
+    except ValueError:
+        return False
+    mapped = getattr(addr, "ipv4_mapped", None)  # ::ffff:127.0.0.1
+    return (mapped or addr).is_loopback
 
 
 async def require_api_auth(request: Request) -> None:
@@ -11,15 +31,18 @@ async def require_api_auth(request: Request) -> None:
 
     - If DIGITALSOV_API_TOKEN is set, require `Authorization: Bearer <token>`.
     - If no token is set, allow requests only from loopback addresses
-      (localhost / 127.0.0.1 / ::1) to keep the default DX unchanged while
-      preventing remote LAN access.
+      (localhost / 127.0.0.0/8 / ::1, IPv4-mapped forms included) to keep
+      the default DX unchanged while preventing remote LAN access.
     """
     client_host = request.client.host if request.client else ""
 
     if API_TOKEN:
         auth_header = request.headers.get("Authorization", "")
-        prefix = "Bearer "
-        if not auth_header.startswith(prefix) or auth_header[len(prefix):].strip() != API_TOKEN:
+        # compare_digest: constant-time, so response timing does not reveal
+        # how much of a guessed token was right.
+        if not auth_header.startswith(_BEARER_PREFIX) or not hmac.compare_digest(
+            auth_header[len(_BEARER_PREFIX):].strip().encode(), _API_TOKEN_BYTES
+        ):
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Invalid or missing API token.",
@@ -27,7 +50,7 @@ async def require_api_auth(request: Request) -> None:
         return
 
     # No token configured — permit only loopback requests.
-    if client_host not in ("127.0.0.1", "::1", "localhost"):
+    if not _is_loopback(client_host):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Remote access requires DIGITALSOV_API_TOKEN.",
@@ -1,12 +1,16 @@
 """Categorization service.
 
 Applies Rule objects to transaction descriptions in priority order.
-Rules are sorted by priority DESC so higher numbers take precedence.
+Rules are sorted by priority DESC so higher numbers take precedence, and
+compiled into matchers once per bulk operation.
 """
 
+import functools
 import re
-from typing import Optional
+from collections import defaultdict
+from typing import Callable, Optional
 
+from sqlalchemy import update
 from sqlalchemy.orm import Session
 
 from ..models import Rule, Transaction
@@ -17,33 +21,60 @@ from ..models import Rule, Transaction
 # ─────────────────────────────────────────────────────────────────────────────
 
 
-def categorize(description_norm: str, rules: list) -> tuple[Optional[int], Optional[int]]:
-    """Return (category_id, rule_id) for the first rule that matches, or (None, None).
+def compile_rules(rules: list) -> list[tuple[Callable[[str], bool], int, int]]:
+    """Turn Rule objects into (test, category_id, rule_id) matchers.
 
-    Rules must already be sorted by priority DESC (highest first).
-    Matching is performed against the normalised (lowercase) description.
+    Patterns are lowered / regex-compiled once here instead of once per
+    transaction.  Inactive rules and invalid regexes are dropped; order is
+    preserved.
     """
+    compiled = []
     for rule in rules:
         if not rule.is_active:
             continue
-        try:
-            matched = False
-            if rule.match_type == "contains":
-                matched = rule.pattern.lower() in description_norm
-            elif rule.match_type == "exact":
-                matched = rule.pattern.lower() == description_norm.strip()
-            elif rule.match_type == "regex":
-                matched = bool(re.search(rule.pattern, description_norm, re.IGNORECASE))
-            if matched:
-                return rule.category_id, rule.id
-        except re.error:
-            continue  # skip invalid regex patterns
+        pat = rule.pattern.lower()
+        if rule.match_type == "contains":
+            test = lambda desc, pat=pat: pat in desc  # noqa: E731
+        elif rule.match_type == "exact":
+            test = lambda desc, pat=pat: pat == desc.strip()  # noqa: E731
+        elif rule.match_type == "regex":
+            try:
+                test = re.compile(rule.pattern, re.IGNORECASE).search
+            except re.error:
+                continue  # skip invalid regex patterns
+        else:
+            continue
+        compiled.append((test, rule.category_id, rule.id))
+    return compiled
+
+
+def categorize(description_norm: str, rules: list) -> tuple[Optional[int], Optional[int]]:
+    """Return (category_id, rule_id) for the first rule that matches, or (None, None).
+
+    ``rules`` comes from compile_rules() over rules sorted by priority DESC
+    (highest first).  Matching is performed against the normalised
+    (lowercase) description.
+    """
+    for test, category_id, rule_id in rules:
+        if test(description_norm):
+            return category_id, rule_id
     return None, None
 
 
+def _memoized(rules: list) -> Callable[[str], tuple[Optional[int], Optional[int]]]:
+    """categorize() bound to ``rules`` and cached per description.
+
+    Bank exports repeat the same normalised description for every recurring
+    charge, so a bulk pass only has to scan the rule list once per distinct
+    description.
+    """
+    return functools.lru_cache(maxsize=None)(functools.partial(categorize, rules=rules))
+
+
 def _load_active_rules(db: Session) -> list:
-    return (
-        db.query(Rule)
+    # Only the columns compile_rules() reads; no Rule instances are needed.
+    return compile_rules(
+        db.query(Rule.id, Rule.category_id, Rule.pattern, Rule.match_type, Rule.is_active)
         .filter(Rule.is_active == True)  # noqa: E712
         .order_by(Rule.priority.desc(), Rule.id.asc())
         .all()
@@ -54,6 +85,10 @@ def _load_active_rules(db: Session) -> list:
 # Bulk operations
 # ─────────────────────────────────────────────────────────────────────────────
 
+# Keeps each UPDATE's IN list well under SQLite's bound-parameter limit.
+_UPDATE_CHUNK_IDS = 500
+_SCAN_CHUNK_ROWS = 1000
+
 
 def apply_rules_to_all(db: Session) -> dict:
     """Recategorize EVERY transaction using the current active rule set.
@@ -61,26 +96,45 @@ def apply_rules_to_all(db: Session) -> dict:
     This is a full re-scan: previously set category_ids are overwritten.
     Returns counts of updated / unchanged / total transactions.
     """
-    rules = _load_active_rules(db)
-    transactions = db.query(Transaction).all()
-    updated = 0
+    match = _memoized(_load_active_rules(db))
+    rows = db.query(
+        Transaction.id,
+        Transaction.description_norm,
+        Transaction.category_id,
+        Transaction.category_rule_id,
+    ).yield_per(_SCAN_CHUNK_ROWS)
+
+    # Changed rows are bucketed by their new assignment so each distinct
+    # (category, rule) pair costs one UPDATE rather than one per row.  Only
+    # the ids are kept; the UPDATEs run once the scan cursor is exhausted so
+    # they never rewrite rows the scan has yet to reach.
+    buckets: dict[tuple[Optional[int], Optional[int]], list[int]] = defaultdict(list)
+    total = 0
+    for tx_id, description_norm, category_id, rule_id in rows:
+        total += 1
+        assignment = match(description_norm)
+        if assignment != (category_id, rule_id):
+            buckets[assignment].append(tx_id)
 
-    for tx in transactions:
-        new_cat, new_rule_id = categorize(tx.description_norm, rules)
+    updated = 0
+    for (new_cat, new_rule_id), ids in buckets.items():
         new_source = "rule" if new_cat is not None else "uncategorized"
-        if tx.category_id != new_cat or tx.category_rule_id != new_rule_id:
-            tx.category_id = new_cat
-            tx.category_source = new_source
-            tx.category_rule_id = new_rule_id
-            updated += 1
+        for start in range(0, len(ids), _UPDATE_CHUNK_IDS):
+            db.execute(
+                update(Transaction)
+                .where(Transaction.id.in_(ids[start : start + _UPDATE_CHUNK_IDS]))
+                .values(category_id=new_cat, category_rule_id=new_rule_id, category_source=new_source)
+                .execution_options(synchronize_session=False)
+            )
+        updated += len(ids)
 
     if updated:
         db.commit()
 
     return {
         "updated": updated,
-        "unchanged": len(transactions) - updated,
-        "total": len(transactions),
+        "unchanged": total - updated,
+        "total": total,
     }
 
 
@@ -93,6 +147,7 @@ def auto_categorize_import(db: Session, import_id: int) -> None:
     rules = _load_active_rules(db)
     if not rules:
         return
+    match = _memoized(rules)
 
     transactions = (
         db.query(Transaction)
@@ -101,7 +156,7 @@ def auto_categorize_import(db: Session, import_id: int) -> None:
     )
     changed = False
     for tx in transactions:
-        cat_id, rule_id = categorize(tx.description_norm, rules)
+        cat_id, rule_id = match(tx.description_norm)
         new_source = "rule" if cat_id is not None else "uncategorized"
         if tx.category_id != cat_id or tx.category_rule_id != rule_id:
             tx.category_id = cat_id
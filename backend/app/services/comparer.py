@@ -1,98 +1,221 @@
 """Period comparison service — compare two date ranges across totals,
 categories, merchants, and recurring patterns."""
 
-from collections import defaultdict
-from datetime import date as _date
+import heapq
+from dataclasses import dataclass
 from typing import Optional
 
-from sqlalchemy.orm import Session, joinedload
+from sqlalchemy import Integer, Row, and_, case, cast, func, literal_column, or_, select, union_all
+from sqlalchemy.orm import Session
 
-from ..models import Transaction
+from ..models import Category, Transaction
 
 # Minimum absolute delta (dollars) to flag a recurring-charge change
 _RECURRING_CHANGE_THRESHOLD = 5.0
 # A merchant must appear >= this many times in a period to be "recurring"
 _RECURRING_MIN_COUNT = 2
 
+_EXCLUDED_TYPES = ("transfer", "payment")
 
-def _merchant_display(tx: Transaction) -> str:
-    return tx.merchant_canonical or tx.merchant or ""
+# A transaction's merchant as shown: merchant_canonical, else merchant, with
+# empty strings falling through to the next choice.
+_MERCHANT_DISPLAY = func.coalesce(
+    func.nullif(Transaction.merchant_canonical, ""), func.nullif(Transaction.merchant, ""), ""
+)
 
+# posted_date as a whole day number, parsed by SQLite so cadence spans are
+# plain integer subtraction.  Every stored date sits at the same midnight
+# fraction of a Julian day, so truncation keeps the differences exact.
+_POSTED_DAY = cast(func.julianday(Transaction.posted_date), Integer)
 
-def _merchant_key(tx: Transaction) -> str:
-    return _merchant_display(tx).lower().strip()
 
+def _in_range(from_date: str, to_date: str):
+    return and_(Transaction.posted_date >= from_date, Transaction.posted_date <= to_date)
 
-def _period_txns(db: Session, from_date: str, to_date: str) -> list[Transaction]:
-    """Return non-transfer transactions for the given date range."""
+
+def _period_filter(from_date: str, to_date: str) -> tuple:
+    """Non-transfer transactions in the given date range."""
     return (
-        db.query(Transaction)
-        .options(joinedload(Transaction.category))
-        .filter(
-            Transaction.posted_date >= from_date,
-            Transaction.posted_date <= to_date,
-            Transaction.transaction_type.notin_(["transfer", "payment"]),
-        )
-        .all()
+        _in_range(from_date, to_date),
+        Transaction.transaction_type.notin_(_EXCLUDED_TYPES),
     )
 
 
-def _compute_totals(txns: list[Transaction]) -> dict:
-    income = sum(t.amount_cents for t in txns if t.amount_cents > 0)
-    expense = sum(t.amount_cents for t in txns if t.amount_cents < 0)
+def _both_periods(
+    db: Session, build, period_a: tuple[str, str], period_b: tuple[str, str], order_by: tuple = ()
+) -> tuple[list[Row], list[Row]]:
+    """Run the ``build(from_date, to_date)`` select for both periods in one
+    UNION ALL round trip; a period tag column splits the rows back apart.
+    ``order_by`` names result columns to order each period's rows by."""
+    union = union_all(
+        build(*period_a).add_columns(literal_column("0").label("period")),
+        build(*period_b).add_columns(literal_column("1").label("period")),
+    )
+    cols = union.selected_columns
+    split: tuple[list[Row], list[Row]] = ([], [])
+    for row in db.execute(union.order_by(cols.period, *(cols[name] for name in order_by))):
+        split[row.period].append(row)
+    return split
+
+
+class _Group:
+    """One merchant's figures within a period.
+
+    Slotted: a profile can have thousands of merchant groups, and these are
+    smaller and quicker to update than per-group dicts.
+    """
+
+    __slots__ = ("name", "total_cents", "count", "first_day", "last_day")
+
+    def __init__(
+        self,
+        name: str,
+        total_cents: int = 0,
+        count: int = 0,
+        first_day: Optional[int] = None,
+        last_day: Optional[int] = None,
+    ):
+        self.name = name
+        self.total_cents = total_cents
+        self.count = count
+        self.first_day = first_day
+        self.last_day = last_day
+
+
+# Delta entries are dataclasses rather than dicts: cheaper to build, and
+# orjson serializes them natively with the same keys.
+@dataclass
+class _CategoryDelta:
+    category_id: Optional[int]
+    category_name: str
+    a_total: float
+    b_total: float
+    delta: float
+    pct_change: Optional[float]
+    a_count: int
+    b_count: int
+
+
+@dataclass
+class _MerchantDelta:
+    merchant: str
+    a_total: float
+    b_total: float
+    delta: float
+    pct_change: Optional[float]
+    a_count: int
+    b_count: int
+
+
+def _totals_select(from_date: str, to_date: str):
+    return select(
+        func.coalesce(
+            func.sum(case((Transaction.amount_cents > 0, Transaction.amount_cents), else_=0)), 0
+        ).label("income"),
+        func.coalesce(
+            func.sum(case((Transaction.amount_cents < 0, Transaction.amount_cents), else_=0)), 0
+        ).label("expense"),
+        func.count().label("count"),
+    ).where(*_period_filter(from_date, to_date))
+
+
+def _compute_totals(row: Row) -> dict:
+    income, expense = row.income, row.expense
     return {
         "income": round(income / 100, 2),
         "expense": round(expense / 100, 2),
         "net": round((income + expense) / 100, 2),
-        "tx_count": len(txns),
+        "tx_count": row.count,
     }
 
 
-def _category_groups(txns: list[Transaction]) -> dict[str, dict]:
-    groups: dict[str, dict] = {}
-    for t in txns:
-        key = f"cat:{t.category_id}" if t.category_id is not None else "cat:null"
-        if key not in groups:
-            groups[key] = {
-                "category_id": t.category_id,
-                "category_name": (t.category.name if t.category else "Uncategorized"),
-                "total_cents": 0,
-                "count": 0,
-            }
-        groups[key]["total_cents"] += t.amount_cents
-        groups[key]["count"] += 1
-    return groups
+def _category_pivot(period_a: tuple[str, str], period_b: tuple[str, str]):
+    """Both periods' per-category totals side by side, one row per category
+    seen in either period, so each row is already a category delta."""
+    in_a, in_b = _in_range(*period_a), _in_range(*period_b)
+    return (
+        select(
+            Transaction.category_id,
+            Category.name.label("category_name"),
+            func.sum(case((in_a, Transaction.amount_cents), else_=0)).label("a_total"),
+            func.sum(case((in_b, Transaction.amount_cents), else_=0)).label("b_total"),
+            func.count(case((in_a, 1))).label("a_count"),
+            func.count(case((in_b, 1))).label("b_count"),
+        )
+        .outerjoin_from(Transaction, Category, Transaction.category_id == Category.id)
+        .where(or_(in_a, in_b), Transaction.transaction_type.notin_(_EXCLUDED_TYPES))
+        .group_by(Transaction.category_id)
+    )
+
+
+def _merchant_select(from_date: str, to_date: str):
+    # One row per exact display string, with its first row id so callers can
+    # order by first appearance, and its date span for cadence detection.
+    return (
+        select(
+            _MERCHANT_DISPLAY.label("merchant"),
+            func.sum(Transaction.amount_cents).label("total"),
+            func.count().label("count"),
+            func.min(Transaction.id).label("first_id"),
+            func.min(_POSTED_DAY).label("first_day"),
+            func.max(_POSTED_DAY).label("last_day"),
+        )
+        .where(*_period_filter(from_date, to_date))
+        .group_by(_MERCHANT_DISPLAY)
+    )
 
 
-def _merchant_groups(txns: list[Transaction]) -> dict[str, dict]:
-    groups: dict[str, dict] = {}
-    for t in txns:
-        key = _merchant_key(t)
+def _merchant_groups(rows: list[Row]) -> dict[str, _Group]:
+    # Display strings that differ only by case / surrounding whitespace are
+    # merged here under the same key Python's lower()/strip() gives (SQLite's
+    # lower() is ASCII-only).  Rows arrive in first-appearance order, so the
+    # earliest row's spelling is shown.
+    groups: dict[str, _Group] = {}
+    for display, total, count, _, first_day, last_day, _ in rows:
+        key = display.lower().strip()
         if not key:
             continue
-        if key not in groups:
-            groups[key] = {"merchant": _merchant_display(t), "total_cents": 0, "count": 0}
-        groups[key]["total_cents"] += t.amount_cents
-        groups[key]["count"] += 1
+        g = groups.get(key)
+        if g is None:
+            groups[key] = _Group(display, total, count, first_day=first_day, last_day=last_day)
+            continue
+        g.total_cents += total
+        g.count += count
+        if first_day < g.first_day:
+            g.first_day = first_day
+        if last_day > g.last_day:
+            g.last_day = last_day
     return groups
 
 
-def _pct_change(a: float, b: float) -> Optional[float]:
-    if a == 0:
+def _paired(groups_a: dict[str, _Group], groups_b: dict[str, _Group]):
+    """Yield (key, a_group, b_group) for every key in either period; a side
+    the key is missing from comes back as None."""
+    b_rest = dict(groups_b)
+    for key, ga in groups_a.items():
+        yield key, ga, b_rest.pop(key, None)
+    for key, gb in b_rest.items():
+        yield key, None, gb
+
+
+def _pct_change(a_cents: int, b_cents: int) -> Optional[float]:
+    if a_cents == 0:
         return None
-    return round((b - a) / abs(a) * 100, 1)
+    # One correctly rounded int / int division; no intermediate float error.
+    return round((b_cents - a_cents) * 100 / abs(a_cents), 1)
 
 
-def _detect_cadence(txns: list[Transaction]) -> Optional[str]:
-    if len(txns) < 2:
+def _avg_dollars(group: _Group) -> float:
+    return group.total_cents / group.count / 100
+
+
+def _detect_cadence(group: _Group) -> Optional[str]:
+    count = group.count
+    if count < 2:
         return None
-    dates = sorted(t.posted_date for t in txns)
-    gaps = []
-    for i in range(1, len(dates)):
-        d1 = _date.fromisoformat(dates[i - 1])
-        d2 = _date.fromisoformat(dates[i])
-        gaps.append((d2 - d1).days)
-    avg_gap = sum(gaps) / len(gaps)
+    # The mean gap between consecutive sorted dates telescopes to the span
+    # over the number of gaps, so only the first and last day are needed.
+    avg_gap = (group.last_day - group.first_day) / (count - 1)
     if 6 <= avg_gap <= 8:
         return "weekly"
     if 13 <= avg_gap <= 16:
@@ -110,12 +233,12 @@ def get_period_comparison(
     to_b: str,
     limit_merchants: int = 20,
 ) -> dict:
-    txns_a = _period_txns(db, from_a, to_a)
-    txns_b = _period_txns(db, from_b, to_b)
+    period_a, period_b = (from_a, to_a), (from_b, to_b)
 
     # ── Totals ────────────────────────────────────────────────────────────────
-    tot_a = _compute_totals(txns_a)
-    tot_b = _compute_totals(txns_b)
+    (row_a,), (row_b,) = _both_periods(db, _totals_select, period_a, period_b)
+    tot_a = _compute_totals(row_a)
+    tot_b = _compute_totals(row_b)
     totals = {
         "incomeA": tot_a["income"],
         "expenseA": tot_a["expense"],
@@ -132,104 +255,83 @@ def get_period_comparison(
     }
 
     # ── Category deltas ───────────────────────────────────────────────────────
-    cats_a = _category_groups(txns_a)
-    cats_b = _category_groups(txns_b)
-    all_cat_keys = set(cats_a) | set(cats_b)
-
-    _empty_cat = {"category_id": None, "category_name": "Uncategorized", "total_cents": 0, "count": 0}
-    category_deltas = []
-    for key in all_cat_keys:
-        ga = cats_a.get(key, _empty_cat)
-        gb = cats_b.get(key, _empty_cat)
-        meta = ga if ga["total_cents"] != 0 else gb
-        a_total = round(ga["total_cents"] / 100, 2)
-        b_total = round(gb["total_cents"] / 100, 2)
-        delta = round(b_total - a_total, 2)
-        category_deltas.append({
-            "category_id": meta["category_id"],
-            "category_name": meta["category_name"],
-            "a_total": a_total,
-            "b_total": b_total,
-            "delta": delta,
-            "pct_change": _pct_change(a_total, b_total),
-            "a_count": ga["count"],
-            "b_count": gb["count"],
-        })
-    category_deltas.sort(key=lambda x: abs(x["delta"]), reverse=True)
+    category_deltas = [
+        _CategoryDelta(
+            r.category_id,
+            r.category_name if r.category_name is not None else "Uncategorized",
+            r.a_total / 100,
+            r.b_total / 100,
+            (r.b_total - r.a_total) / 100,
+            _pct_change(r.a_total, r.b_total),
+            r.a_count,
+            r.b_count,
+        )
+        for r in db.execute(_category_pivot(period_a, period_b))
+    ]
+    category_deltas.sort(key=lambda x: abs(x.delta), reverse=True)
 
     # ── Merchant deltas ───────────────────────────────────────────────────────
-    merch_a = _merchant_groups(txns_a)
-    merch_b = _merchant_groups(txns_b)
-    all_merch_keys = set(merch_a) | set(merch_b)
+    merch_a, merch_b = map(
+        _merchant_groups, _both_periods(db, _merchant_select, period_a, period_b, ("first_id",))
+    )
 
     merchant_deltas = []
-    for key in all_merch_keys:
-        ga = merch_a.get(key, {"merchant": key, "total_cents": 0, "count": 0})
-        gb = merch_b.get(key, {"merchant": ga["merchant"], "total_cents": 0, "count": 0})
-        display = ga["merchant"] if ga["total_cents"] != 0 else gb["merchant"]
-        a_total = round(ga["total_cents"] / 100, 2)
-        b_total = round(gb["total_cents"] / 100, 2)
-        delta = round(b_total - a_total, 2)
-        merchant_deltas.append({
-            "merchant": display,
-            "a_total": a_total,
-            "b_total": b_total,
-            "delta": delta,
-            "pct_change": _pct_change(a_total, b_total),
-            "a_count": ga["count"],
-            "b_count": gb["count"],
-        })
-    merchant_deltas.sort(key=lambda x: abs(x["delta"]), reverse=True)
-    merchant_deltas = merchant_deltas[:limit_merchants]
+    for key, ga, gb in _paired(merch_a, merch_b):
+        ga = ga or _Group(key)
+        gb = gb or _Group(ga.name)
+        display = ga.name if ga.total_cents != 0 else gb.name
+        a_cents = ga.total_cents
+        b_cents = gb.total_cents
+        merchant_deltas.append(_MerchantDelta(
+            display,
+            a_cents / 100,
+            b_cents / 100,
+            (b_cents - a_cents) / 100,
+            _pct_change(a_cents, b_cents),
+            ga.count,
+            gb.count,
+        ))
+    merchant_deltas = heapq.nlargest(limit_merchants, merchant_deltas, key=lambda x: abs(x.delta))
 
     # ── Recurring changes ─────────────────────────────────────────────────────
-    def _recurring_groups(txns: list[Transaction]) -> dict[str, list[Transaction]]:
-        g: dict[str, list[Transaction]] = defaultdict(list)
-        for t in txns:
-            k = _merchant_key(t)
-            if k:
-                g[k].append(t)
-        return {k: v for k, v in g.items() if len(v) >= _RECURRING_MIN_COUNT}
-
-    rec_a = _recurring_groups(txns_a)
-    rec_b = _recurring_groups(txns_b)
+    # The merchant groups already carry count, total and date span.
+    rec_a = {k: g for k, g in merch_a.items() if g.count >= _RECURRING_MIN_COUNT}
+    rec_b = {k: g for k, g in merch_b.items() if g.count >= _RECURRING_MIN_COUNT}
 
     new_recurring = []
     stopped_recurring = []
     changed_recurring = []
 
-    for key, b_txns in rec_b.items():
+    for key, gb in rec_b.items():
         if key not in rec_a:
-            avg = sum(t.amount_cents for t in b_txns) / len(b_txns) / 100
             new_recurring.append({
-                "merchant": _merchant_display(b_txns[0]) or key,
-                "amount": round(avg, 2),
-                "cadence": _detect_cadence(b_txns),
+                "merchant": gb.name or key,
+                "amount": round(_avg_dollars(gb), 2),
+                "cadence": _detect_cadence(gb),
             })
 
-    for key, a_txns in rec_a.items():
+    for key, ga in rec_a.items():
         if key not in rec_b:
-            avg = sum(t.amount_cents for t in a_txns) / len(a_txns) / 100
             stopped_recurring.append({
-                "merchant": _merchant_display(a_txns[0]) or key,
-                "amount": round(avg, 2),
-                "cadence": _detect_cadence(a_txns),
+                "merchant": ga.name or key,
+                "amount": round(_avg_dollars(ga), 2),
+                "cadence": _detect_cadence(ga),
             })
 
     for key in rec_a:
         if key in rec_b:
-            a_txns = rec_a[key]
-            b_txns = rec_b[key]
-            avg_a = sum(t.amount_cents for t in a_txns) / len(a_txns) / 100
-            avg_b = sum(t.amount_cents for t in b_txns) / len(b_txns) / 100
+            ga = rec_a[key]
+            gb = rec_b[key]
+            avg_a = _avg_dollars(ga)
+            avg_b = _avg_dollars(gb)
             delta = avg_b - avg_a
             if abs(delta) >= _RECURRING_CHANGE_THRESHOLD:
                 changed_recurring.append({
-                    "merchant": _merchant_display(b_txns[0]) or key,
+                    "merchant": gb.name or key,
                     "amountA": round(avg_a, 2),
                     "amountB": round(avg_b, 2),
                     "delta": round(delta, 2),
-                    "cadence": _detect_cadence(b_txns),
+                    "cadence": _detect_cadence(gb),
                 })
 
     # ── Notes ─────────────────────────────────────────────────────────────────
@@ -173,6 +173,44 @@ def _insert_transaction(
     return True
 
 
+def _existing_import_result(
+    db: Session,
+    file_hash: str,
+    source_type: Optional[str] = None,
+) -> Optional[dict]:
+    """Import result for a file that was already imported, or None if it is new.
+
+    A single probe on the unique file_hash index; the existing import's
+    transaction count comes from its denormalized column.  ``source_type`` overrides the stored value
+    in the result when given.
+    """
+    row = (
+        db.query(
+            Import.id,
+            Import.filename,
+            Import.source_type,
+            Import.column_mapping,
+            Import.created_at,
+            Import.transaction_count,
+        )
+        .filter(Import.file_hash == file_hash)
+        .first()
+    )
+    if row is None:
+        return None
+    imp_id, filename, stored_type, column_mapping, created_at, tx_count = row
+    return {
+        "id": imp_id,
+        "filename": filename,
+        "file_hash": file_hash,
+        "source_type": source_type or stored_type,
+        "column_mapping": column_mapping,
+        "created_at": created_at,
+        "inserted": 0,
+        "skipped": tx_count,
+    }
+
+
 # ─────────────────────────────────────────────────────────────────────────────
 # Legacy import  (POST /imports/)
 # ─────────────────────────────────────────────────────────────────────────────
@@ -183,23 +221,14 @@ def import_csv(
     filename: str,
     content: bytes,
     source_type: str = "generic",
+    file_hash: Optional[str] = None,
 ) -> dict:
     """Import using a pre-configured source-type column mapping."""
-    file_hash = compute_file_hash(content)
-
-    existing = db.query(Import).filter(Import.file_hash == file_hash).first()
-    if existing:
-        tx_count = db.query(Transaction).filter(Transaction.import_id == existing.id).count()
-        return {
-            "id": existing.id,
-            "filename": existing.filename,
-            "file_hash": file_hash,
-            "source_type": existing.source_type,
-            "column_mapping": existing.column_mapping,
-            "created_at": existing.created_at,
-            "inserted": 0,
-            "skipped": tx_count,
-        }
+    file_hash = file_hash or compute_file_hash(content)
+
+    duplicate = _existing_import_result(db, file_hash)
+    if duplicate:
+        return duplicate
 
     mapper = COLUMN_MAPPERS.get(source_type, COLUMN_MAPPERS["generic"])
     text = content.decode("utf-8-sig")
@@ -295,23 +324,14 @@ def import_csv_with_mapping(
     filename: str,
     content: bytes,
     mapping: dict,
+    file_hash: Optional[str] = None,
 ) -> dict:
     """Import a CSV using an explicit column mapping supplied by the user."""
-    file_hash = compute_file_hash(content)
-
-    existing = db.query(Import).filter(Import.file_hash == file_hash).first()
-    if existing:
-        tx_count = db.query(Transaction).filter(Transaction.import_id == existing.id).count()
-        return {
-            "id": existing.id,
-            "filename": existing.filename,
-            "file_hash": file_hash,
-            "source_type": "custom",
-            "column_mapping": existing.column_mapping,
-            "created_at": existing.created_at,
-            "inserted": 0,
-            "skipped": tx_count,
-        }
+    file_hash = file_hash or compute_file_hash(content)
+
+    duplicate = _existing_import_result(db, file_hash, "custom")
+    if duplicate:
+        return duplicate
 
     # ── Column references ─────────────────────────────────────────────────
     col_date: str = mapping.get("posted_date") or ""
@@ -453,6 +473,7 @@ def import_paypal_csv(
     db: Session,
     filename: str,
     content: bytes,
+    file_hash: Optional[str] = None,
 ) -> dict:
     """Import a PayPal CSV activity export.
 
@@ -467,21 +488,11 @@ def import_paypal_csv(
     The same SHA-256 fingerprint deduplication used by all other importers
     automatically handles overlapping date ranges across multiple exports.
     """
-    file_hash = compute_file_hash(content)
-
-    existing = db.query(Import).filter(Import.file_hash == file_hash).first()
-    if existing:
-        tx_count = db.query(Transaction).filter(Transaction.import_id == existing.id).count()
-        return {
-            "id": existing.id,
-            "filename": existing.filename,
-            "file_hash": file_hash,
-            "source_type": "paypal",
-            "column_mapping": None,
-            "created_at": existing.created_at,
-            "inserted": 0,
-            "skipped": tx_count,
-        }
+    file_hash = file_hash or compute_file_hash(content)
+
+    duplicate = _existing_import_result(db, file_hash, "paypal")
+    if duplicate:
+        return duplicate
 
     text = content.decode("utf-8-sig")
     reader = csv.DictReader(io.StringIO(text))
@@ -580,6 +591,7 @@ def import_pdf_with_mapping(
     filename: str,
     content: bytes,
     mapping: dict,
+    file_hash: Optional[str] = None,
 ) -> dict:
     """Extract tables from a PDF and import rows using an explicit column mapping.
 
@@ -588,6 +600,12 @@ def import_pdf_with_mapping(
     """
     from .pdf_extractor import extract_pdf, extract_txt  # local import to avoid circular at load time
 
+    # ── File-level dedup — before extraction, which is the expensive part ─────
+    file_hash = file_hash or compute_file_hash(content)
+    duplicate = _existing_import_result(db, file_hash, "pdf")
+    if duplicate:
+        return duplicate
+
     extraction = extract_txt(content) if filename.lower().endswith(".txt") else extract_pdf(content)
     if extraction["status"] != "preview":
         raise ValueError(
@@ -597,22 +615,6 @@ def import_pdf_with_mapping(
     all_rows: list[dict] = extraction["rows"]
     headers: list[str] = extraction["headers"]
 
-    # ── File-level dedup ─────────────────────────────────────────────────────
-    file_hash = compute_file_hash(content)
-    existing = db.query(Import).filter(Import.file_hash == file_hash).first()
-    if existing:
-        tx_count = db.query(Transaction).filter(Transaction.import_id == existing.id).count()
-        return {
-            "id": existing.id,
-            "filename": existing.filename,
-            "file_hash": file_hash,
-            "source_type": "pdf",
-            "column_mapping": existing.column_mapping,
-            "created_at": existing.created_at,
-            "inserted": 0,
-            "skipped": tx_count,
-        }
-
     # ── Column references ─────────────────────────────────────────────────────
     col_date: str = mapping.get("posted_date") or ""
     col_desc: str = mapping.get("description_raw") or ""
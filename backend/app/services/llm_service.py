@@ -2,10 +2,11 @@
 
 import json
 import logging
-from datetime import datetime
-from typing import Any, AsyncIterator
+from datetime import datetime, timezone
+from typing import Any, AsyncIterator, Callable
 
 import httpx
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlalchemy.orm import Session, joinedload
 
 from ..models import Setting, Transaction
@@ -147,6 +148,21 @@ def set_setting(db: Session, key: str, value: str) -> None:
     db.commit()
 
 
+def set_settings_bulk(db: Session, values: dict[str, str]) -> None:
+    """Upsert several settings in one INSERT … ON CONFLICT statement and commit."""
+    now = datetime.now(timezone.utc)
+    stmt = sqlite_insert(Setting).values(
+        [{"key": k, "value": v, "updated_at": now} for k, v in values.items()]
+    )
+    db.execute(
+        stmt.on_conflict_do_update(
+            index_elements=[Setting.key],
+            set_={"value": stmt.excluded.value, "updated_at": stmt.excluded.updated_at},
+        )
+    )
+    db.commit()
+
+
 def get_llm_settings(db: Session) -> dict:
     return {
         "provider": get_setting(db, "llm_provider", "ollama"),
@@ -318,7 +334,7 @@ def _tool_label(name: str, args: dict) -> str:
 async def chat_stream(
     messages: list[dict],
     model: str,
-    db: Session,
+    session_factory: Callable[[], Session],
 ) -> AsyncIterator[str]:
     """
     Agentic chat with tool-calling.  Streams SSE events:
@@ -329,10 +345,15 @@ async def chat_stream(
       event: answer      data: {model, answer, facts_used, follow_ups, tools_called}
       event: error       data: {"message": "..."}
       event: done        data: {}
+
+    ``session_factory`` opens a short-lived session for each piece of DB work
+    (the financial context, then every tool call), so no connection is held
+    while awaiting Ollama.
     """
     from .transaction_tools import TOOLS, execute_tool
 
-    context = build_financial_context(db)
+    with session_factory() as db:
+        context = build_financial_context(db)
     original_question = next(
         (m["content"] for m in reversed(messages) if m.get("role") == "user"), ""
     )
@@ -416,7 +437,8 @@ async def chat_stream(
                 label = _tool_label(name, args)
                 yield _sse("tool_call", {"id": tool_idx, "name": name, "label": label, "args": args})
 
-                result_text = execute_tool(name, args, db, include_raw=include_raw)
+                with session_factory() as db:
+                    result_text = execute_tool(name, args, db, include_raw=include_raw)
                 summary = result_text.split("\n")[0].strip()
 
                 tools_called.append({"id": tool_idx, "name": name, "label": label, "summary": summary})
@@ -0,0 +1,39 @@
+import pytest
+
+
+@pytest.fixture
+def profile(tmp_path, monkeypatch):
+    """A freshly migrated and seeded "sample" profile in a throwaway PROFILES_DIR."""
+    from app import database
+
+    monkeypatch.setattr(database, "PROFILES_DIR", tmp_path)
+    name = database.init_profile_db("sample")
+    yield name
+    database.remove_profile_db(name)
+
+
+@pytest.fixture
+def db(profile):
+    from app.database import _session_factory
+
+    session = _session_factory(profile)()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+@pytest.fixture
+def client(profile):
+    """TestClient bound to the sample profile.  The loopback-only auth guard
+    would reject TestClient's "testclient" host, so it is overridden."""
+    from fastapi.testclient import TestClient
+
+    from app.main import app
+    from app.security import require_api_auth
+
+    app.dependency_overrides[require_api_auth] = lambda: None
+    try:
+        yield TestClient(app, headers={"X-Profile": profile})
+    finally:
+        app.dependency_overrides.pop(require_api_auth, None)
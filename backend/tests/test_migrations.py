@@ -0,0 +1,172 @@
+"""Schema behaviour that lives in the database: migrations, foreign-key
+cascades, and the deletes that rely on them."""
+
+import pytest
+
+pytest.importorskip("fastapi")
+
+from sqlalchemy import func, insert, select, text  # noqa: E402
+
+from app import database  # noqa: E402
+from app.models import Category, Import, Rule, Tag, Transaction, transaction_tags  # noqa: E402
+
+
+def _alembic(command_name: str, profile: str, revision: str) -> None:
+    from alembic import command
+    from alembic.config import Config
+
+    cfg = Config()
+    cfg.set_main_option("script_location", str(database.ALEMBIC_DIR))
+    cfg.set_main_option("sqlalchemy.url", f"sqlite:///{database.PROFILES_DIR / f'{profile}.db'}")
+    getattr(command, command_name)(cfg, revision)
+
+
+def _tag_links(db, tx_ids: list[int]) -> int:
+    return db.execute(
+        select(func.count()).where(transaction_tags.c.transaction_id.in_(tx_ids))
+    ).scalar()
+
+
+def _assert_counts_match(db) -> None:
+    """imports.transaction_count agrees with the rows actually there."""
+    actual = dict(
+        db.query(Transaction.import_id, func.count()).group_by(Transaction.import_id).all()
+    )
+    stored = dict(db.query(Import.id, Import.transaction_count).all())
+    assert stored == {imp_id: actual.get(imp_id, 0) for imp_id in stored}
+
+
+def _rewind_to_0010(profile: str, db) -> None:
+    """Downgrade the profile to 0010, then re-run startup init as a restart would."""
+    db.close()
+    database._engines[profile].dispose()
+    _alembic("downgrade", profile, "0010")
+    database._fully_initialized.discard(profile)
+    database.init_profile_db(profile)
+
+
+@pytest.fixture
+def tagged_import(db):
+    """The first import's id, its transaction ids, and a tag on each of them."""
+    imp_id = db.query(Import.id).order_by(Import.id).first().id
+    tx_ids = [r.id for r in db.query(Transaction.id).filter(Transaction.import_id == imp_id)]
+    tag = Tag(name="t")
+    db.add(tag)
+    db.flush()
+    db.execute(
+        insert(transaction_tags),
+        [{"transaction_id": tx_id, "tag_id": tag.id} for tx_id in tx_ids],
+    )
+    db.commit()
+    return imp_id, tx_ids
+
+
+class TestUpgradeFrom0010:
+    def test_upgrade_to_head(self, profile, db):
+        _rewind_to_0010(profile, db)
+
+        fks = db.execute(text("PRAGMA foreign_key_list(transactions)")).all()
+        on_delete = {fk.table: fk.on_delete for fk in fks}
+        assert on_delete["imports"] == "CASCADE"
+        assert db.execute(text("SELECT version_num FROM alembic_version")).scalar() == (
+            database._alembic_config()[1]
+        )
+        # 0015 backfills transaction_count from the existing rows.
+        assert db.query(func.sum(Import.transaction_count)).scalar() == db.query(Transaction).count()
+        _assert_counts_match(db)
+
+    def test_merchant_search_after_upgrade(self, profile, db):
+        from app.routers.transactions import _merchant_match
+
+        tx = db.query(Transaction).filter(Transaction.merchant == "Netflix").first()
+        tx.merchant_canonical = "Streaming Co"
+        db.commit()
+        tx_id = tx.id
+        _rewind_to_0010(profile, db)
+
+        # 0016 indexed only three columns; 0018 rebuilds with merchant_canonical.
+        assert [r.rowid for r in db.execute(_merchant_match("streaming co"))] == [tx_id]
+
+    def test_cascade_after_upgrade(self, profile, db, tagged_import):
+        imp_id, tx_ids = tagged_import
+        _rewind_to_0010(profile, db)
+
+        db.execute(text("DELETE FROM imports WHERE id = :id"), {"id": imp_id})
+        db.commit()
+        assert db.query(Transaction).filter(Transaction.import_id == imp_id).count() == 0
+        assert _tag_links(db, tx_ids) == 0
+
+
+class TestDeletes:
+    def test_import_delete_cascades(self, client, db, tagged_import):
+        imp_id, tx_ids = tagged_import
+        other = db.query(Transaction).filter(Transaction.import_id != imp_id).count()
+        assert other > 0
+
+        assert client.delete(f"/imports/{imp_id}").status_code == 204
+        assert db.get(Import, imp_id) is None
+        assert db.query(Transaction).filter(Transaction.id.in_(tx_ids)).count() == 0
+        assert _tag_links(db, tx_ids) == 0
+        assert db.query(Transaction).count() == other
+
+    def test_delete_category_clears_rule_provenance_elsewhere(self, client, db):
+        doomed = db.query(Category).filter(Category.name == "Subscriptions").one()
+        keeper = db.query(Category).filter(Category.name == "Shopping").one()
+        rule = Rule(pattern="netflix", match_type="contains", category_id=doomed.id)
+        db.add(rule)
+        db.flush()
+        # Categorized by the rule, then refiled under another category while
+        # keeping the rule as provenance.
+        tx = db.query(Transaction).filter(Transaction.merchant == "Netflix").first()
+        tx.category_id = keeper.id
+        tx.category_rule_id = rule.id
+        tx.category_source = "rule"
+        db.commit()
+        tx_id, rule_id = tx.id, rule.id
+
+        assert client.delete(f"/categories/{doomed.id}").status_code == 204
+        db.expire_all()
+        tx = db.get(Transaction, tx_id)
+        assert tx.category_id == keeper.id
+        assert tx.category_rule_id is None
+        assert db.get(Rule, rule_id) is None
+
+
+class TestTransactionCount:
+    def test_triggers_track_insert_delete_and_move(self, db):
+        imp_a, imp_b = (r.id for r in db.query(Import.id).order_by(Import.id).limit(2))
+        _assert_counts_match(db)
+
+        db.add(Transaction(
+            import_id=imp_a,
+            posted_date="2020-01-01",
+            description_raw="NEW ROW",
+            description_norm="new row",
+            amount_cents=-100,
+            fingerprint_hash="count-test",
+        ))
+        db.commit()
+        _assert_counts_match(db)
+
+        db.delete(db.query(Transaction).filter(Transaction.import_id == imp_b).first())
+        db.commit()
+        _assert_counts_match(db)
+
+        moved = db.query(Transaction).filter(Transaction.import_id == imp_a).first()
+        moved.import_id = imp_b
+        db.commit()
+        _assert_counts_match(db)
+
+    def test_import_delete_and_listing(self, client, db, tagged_import):
+        imp_id, _ = tagged_import
+        assert client.delete(f"/imports/{imp_id}").status_code == 204
+        _assert_counts_match(db)
+
+        listed = {i["id"]: i["transaction_count"] for i in client.get("/imports/list").json()}
+        stored = dict(db.query(Import.id, Import.transaction_count).all())
+        assert listed == stored
+        assert all(count > 0 for count in listed.values())
+
+        imp_id, count = next(iter(stored.items()))
+        resp = client.patch(f"/imports/{imp_id}", json={"notes": "checked"})
+        assert resp.json()["transaction_count"] == count
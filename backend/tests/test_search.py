@@ -0,0 +1,167 @@
+"""Substring search served by the trigram FTS5 index (transactions_fts)."""
+
+import itertools
+import sqlite3
+
+import pytest
+
+pytest.importorskip("fastapi")
+
+from sqlalchemy import or_  # noqa: E402
+
+from app import database  # noqa: E402
+from app.models import Import, Transaction  # noqa: E402
+from app.routers.reports import _TRACKED_GROUPS, _TRACKED_PATTERNS, _income_housing  # noqa: E402
+
+_fingerprints = itertools.count()
+
+
+def _add_tx(db, posted_date: str, description: str, merchant, cents: int, tx_type: str = "normal"):
+    tx = Transaction(
+        import_id=db.query(Import.id).order_by(Import.id).first().id,
+        posted_date=posted_date,
+        description_raw=description,
+        description_norm=description.lower(),
+        merchant=merchant,
+        amount_cents=cents,
+        transaction_type=tx_type,
+        fingerprint_hash=f"search-test-{next(_fingerprints)}",
+    )
+    db.add(tx)
+    return tx
+
+
+def _ilike_groups(db, year):
+    """Per-group (total_cents, count) from the plain three-column ilike filter."""
+    out = []
+    for g in _TRACKED_GROUPS:
+        q = db.query(Transaction).filter(
+            Transaction.transaction_type != "transfer",
+            or_(*(
+                or_(
+                    Transaction.description_raw.ilike(f"%{p}%"),
+                    Transaction.description_norm.ilike(f"%{p}%"),
+                    Transaction.merchant.ilike(f"%{p}%"),
+                )
+                for p in g["patterns"]
+            )),
+        )
+        if g.get("amount_sign") == "positive":
+            q = q.filter(Transaction.amount_cents > 0)
+        elif g.get("amount_sign") == "negative":
+            q = q.filter(Transaction.amount_cents < 0)
+        if year:
+            q = q.filter(Transaction.posted_date.between(f"{year}-01-01", f"{year}-12-31"))
+        txs = q.all()
+        out.append((sum(t.amount_cents for t in txs), len(txs)))
+    return out
+
+
+class TestIncomeHousing:
+    def test_patterns_are_trigram_searchable(self):
+        # The trigram tokenizer silently matches nothing for shorter phrases.
+        assert all(len(p) >= 3 for p in _TRACKED_PATTERNS)
+
+    def test_matches_ilike_filter(self, db):
+        _add_tx(db, "2024-03-01", "FOX TV STATIONS PAYROLL", None, 250000)
+        _add_tx(db, "2025-01-15", "Direct dep", "Fox TV", 260000)
+        _add_tx(db, "2025-02-01", "ZELLE PAYMENT FROM J DOE", "Zelle", 5000)
+        _add_tx(db, "2025-02-02", "zelle payment to j doe", "Zelle", -5000)
+        _add_tx(db, "2025-02-03", "PAYPAL INST XFER", None, 1200, tx_type="transfer")
+        _add_tx(db, "2025-02-04", "PayPal *transfer in", None, 3300)
+        _add_tx(db, "2025-03-01", "NEWREZ-SHELLPOIN MTG", "NewRez", -210000)
+        _add_tx(db, "2025-03-02", "CLICKPAY SAXONY SQUARE HOA", None, -35000)
+        _add_tx(db, "2025-03-03", "ATT* BILL PAYMENT", "AT&T", -8500)
+        _add_tx(db, "2025-03-04", "AT&T BILL", None, -8600)
+        _add_tx(db, "2025-03-05", "VZ WIRELESS", "Verizon Wireless", -9000)
+        _add_tx(db, "2025-12-31", "Northwestern Mutual", "NORTHWESTERN MU", -15000)
+        _add_tx(db, "2025-04-01", "ROBINHOOD DES:FUNDS", "Robinhood", -50000)
+        _add_tx(db, "2025-04-02", "APPLE CASH SENT MONEY", None, -2000)
+        _add_tx(db, "2025-04-03", "APPLECARD GSBANK PAYMENT", None, -40000)
+        # A pattern split across two fields must not match.
+        _add_tx(db, "2025-04-04", "PAY", "PAL", 100)
+        db.commit()
+
+        for year in (None, "2025", "2024"):
+            got = [(round(g["total"] * 100), g["count"]) for g in _income_housing(db, year)["groups"]]
+            assert got == _ilike_groups(db, year)
+        assert any(count for _, count in _ilike_groups(db, None))
+
+    def test_returns_every_matching_row(self, db):
+        # The page sums and excludes from group.transactions, so none may be dropped.
+        for day in range(150):
+            _add_tx(db, f"2023-{day % 12 + 1:02d}-{day % 28 + 1:02d}", "ZELLE PAYMENT FROM A", None, 100)
+        db.commit()
+
+        for g in _income_housing(db, None)["groups"]:
+            assert len(g["transactions"]) == g["count"]
+            assert round(sum(t["amount"] for t in g["transactions"]) * 100) == round(g["total"] * 100)
+
+    def test_cached_result_follows_commits(self, client, db):
+        def robinhood():
+            groups = client.get("/reports/income-housing").json()["groups"]
+            return next(g["count"] for g in groups if g["key"] == "robinhood")
+
+        assert robinhood() == 0
+        tx = _add_tx(db, "2025-04-01", "ROBINHOOD DES:FUNDS", None, -50000)
+        db.commit()
+        assert robinhood() == 1
+        # Same row count and size, only a field changes.
+        tx.description_raw = tx.description_norm = "robinhood des:fundz"
+        tx.amount_cents = 50000
+        db.commit()
+        assert robinhood() == 0
+
+    def test_cached_result_follows_outside_writers(self, client, db, profile):
+        def robinhood():
+            groups = client.get("/reports/income-housing").json()["groups"]
+            return next(g["count"] for g in groups if g["key"] == "robinhood")
+
+        tx = _add_tx(db, "2025-04-01", "ROBINHOOD DES:FUNDS", None, -50000)
+        db.commit()
+        assert robinhood() == 1
+        # Another process (a second worker, the sqlite3 shell) never runs
+        # this process's commit hooks.
+        outside = sqlite3.connect(database.PROFILES_DIR / f"{profile}.db")
+        outside.execute("UPDATE transactions SET amount_cents = 50000 WHERE id = ?", (tx.id,))
+        outside.commit()
+        outside.close()
+        assert robinhood() == 0
+
+
+class TestMerchantSearch:
+    """transactions_fts is external-content: only its triggers keep it in
+    step with transactions, so search must see inserts, updates and deletes."""
+
+    def _search(self, client, term: str) -> set[int]:
+        resp = client.get("/transactions/", params={"merchant_search": term, "limit": 500})
+        assert resp.status_code == 200
+        return {t["id"] for t in resp.json()["items"]}
+
+    def test_seeded_rows(self, client, db):
+        expected = {t.id for t in db.query(Transaction).filter(Transaction.merchant == "Netflix")}
+        assert expected
+        assert self._search(client, "etfli") == expected
+
+    def test_follows_insert_update_and_delete(self, client, db):
+        tx = _add_tx(db, "2025-05-01", "POS 1234", "Blue Bottle #12", -650)
+        db.commit()
+        assert self._search(client, "bottle") == {tx.id}
+        assert self._search(client, "roastery") == set()
+
+        tx.merchant_canonical = "Blue Bottle Roastery"
+        db.commit()
+        assert self._search(client, "ROASTERY") == {tx.id}
+
+        tx.merchant = "Corner Cafe"
+        db.commit()
+        assert self._search(client, "#12") == set()
+        assert self._search(client, "corner caf") == {tx.id}
+
+        tx.merchant_canonical = None
+        db.commit()
+        assert self._search(client, "roastery") == set()
+
+        db.delete(tx)
+        db.commit()
+        assert self._search(client, "corner caf") == set()
@@ -0,0 +1,163 @@
+"""Smoke tests over the seeded sample profile.
+
+Every relationship is lazy="raise_on_sql", so a code path that forgets to
+eager-load one raises InvalidRequestError instead of quietly issuing N+1
+queries.  These run the services and the ORM-heavy router paths end to end
+so a missed load fails here rather than as a 500.
+"""
+
+from datetime import date
+
+import pytest
+
+pytest.importorskip("fastapi")
+
+from app.models import Category, Import, Rule, Transaction  # noqa: E402
+from app.services.categorizer import apply_rules_to_all, auto_categorize_import  # noqa: E402
+from app.services.comparer import get_period_comparison  # noqa: E402
+from app.services.reporter import (  # noqa: E402
+    get_audit_flags,
+    get_candlestick_data,
+    get_category_breakdown,
+    get_data_health,
+    get_monthly_summary,
+    get_net_worth_by_account,
+    get_period_summary,
+    get_recurring_transactions,
+)
+from app.services.transaction_tools import (  # noqa: E402
+    get_category_transactions,
+    get_largest_transactions,
+    get_month_detail,
+    search_transactions,
+    summarize_period,
+)
+
+
+def _month(offset: int = 0) -> str:
+    today = date.today()
+    year, month = divmod(today.year * 12 + today.month - 1 - offset, 12)
+    return f"{year}-{month + 1:02d}"
+
+
+class TestServices:
+    def test_reporter(self, db):
+        month, first = _month(), _month(2)
+        assert get_monthly_summary(db, month)["transaction_count"] > 0
+        get_category_breakdown(db, first, month)
+        get_audit_flags(db, first, month)
+        get_period_summary(db, f"{first}-01", f"{month}-28")
+        get_candlestick_data(db, f"{first}-01", f"{month}-28", "week")
+        get_recurring_transactions(db)
+        assert get_net_worth_by_account(db)["accounts"]
+        get_data_health(db)
+
+    def test_transaction_tools(self, db):
+        month = _month()
+        assert "Netflix" in search_transactions(db, "netflix")
+        get_month_detail(db, month, include_raw=True)
+        get_category_transactions(db, "Groceries")
+        get_largest_transactions(db, "expense")
+        summarize_period(db, f"{_month(2)}-01", f"{month}-28")
+
+    def test_comparer(self, db):
+        prev, month = _month(1), _month()
+        result = get_period_comparison(db, f"{prev}-01", f"{prev}-31", f"{month}-01", f"{month}-31")
+        assert result["categoryDeltas"]
+        assert result["merchantDeltas"]
+
+    def test_categorizer(self, db):
+        apply_rules_to_all(db)
+        imp = db.query(Import).first()
+        auto_categorize_import(db, imp.id)
+        db.commit()
+
+
+class TestTransactionRoutes:
+    def _first_tx(self, db) -> Transaction:
+        return db.query(Transaction).order_by(Transaction.id).first()
+
+    def test_list_and_export(self, client):
+        resp = client.get("/transactions/", params={"limit": 5, "merchant_search": "net"})
+        assert resp.status_code == 200
+        body = resp.json()
+        assert body["total"] >= 1 and body["items"]
+        assert client.get("/transactions/export").status_code == 200
+
+    def test_keyset_cursor(self, client):
+        everything = client.get("/transactions/", params={"limit": 500}).json()["items"]
+        pages, params = [], {"limit": 7}
+        while True:
+            page = client.get("/transactions/", params=params).json()["items"]
+            if not page:
+                break
+            pages += page
+            params = {"limit": 7, "after_posted_date": page[-1]["posted_date"], "after_id": page[-1]["id"]}
+        assert [t["id"] for t in pages] == [t["id"] for t in everything]
+
+        last = everything[0]
+        for bad in (
+            {"after_id": last["id"]},
+            {"after_posted_date": last["posted_date"]},
+            {"after_posted_date": last["posted_date"], "after_id": last["id"], "offset": 5},
+            {"after_posted_date": "2025-13-99", "after_id": last["id"]},
+        ):
+            assert client.get("/transactions/", params=bad).status_code == 422
+
+    def test_patch_category_and_note(self, client, db):
+        tx = self._first_tx(db)
+        cat = db.query(Category).filter(Category.name == "Shopping").one()
+        resp = client.patch(f"/transactions/{tx.id}/category", json={"category_id": cat.id})
+        assert resp.status_code == 200
+        assert resp.json()["category_name"] == "Shopping"
+        resp = client.patch(f"/transactions/{tx.id}/note", json={"note": "checked"})
+        assert resp.status_code == 200
+        assert resp.json()["note"] == "checked"
+        assert resp.json()["category_name"] == "Shopping"
+
+    def test_replace_tags(self, client, db):
+        tx = self._first_tx(db)
+        tag_ids = [client.post("/tags/", json={"name": n}).json()["id"] for n in ("a", "b")]
+        resp = client.put(f"/transactions/{tx.id}/tags", json={"tag_ids": tag_ids})
+        assert resp.status_code == 200
+        assert sorted(t["id"] for t in resp.json()) == sorted(tag_ids)
+        resp = client.put(f"/transactions/{tx.id}/tags", json={"tag_ids": tag_ids[:1]})
+        assert [t["id"] for t in client.get(f"/transactions/{tx.id}/tags").json()] == tag_ids[:1]
+        assert client.delete(f"/tags/{tag_ids[0]}").status_code == 204
+
+    def test_delete_transaction(self, client, db):
+        tx = self._first_tx(db)
+        assert client.delete(f"/transactions/{tx.id}").status_code == 204
+        assert client.delete(f"/transactions/{tx.id}").status_code == 404
+
+
+class TestRuleAndCategoryRoutes:
+    def test_rules(self, client, db):
+        assert client.get("/rules/").status_code == 200
+        cat = db.query(Category).filter(Category.name == "Entertainment").one()
+        resp = client.post(
+            "/rules/", json={"pattern": "peak fitness", "match_type": "contains", "category_id": cat.id}
+        )
+        assert resp.status_code == 201
+        rule_id = resp.json()["id"]
+        assert client.post("/rules/apply").status_code == 200
+        assert client.get("/rules/suggestions").status_code == 200
+        # create, update and suggestion-apply share one missing-category error.
+        missing = {"pattern": "x", "match_type": "contains", "category_id": 10**6}
+        errors = [
+            client.post("/rules/", json=missing),
+            client.put(f"/rules/{rule_id}", json={**missing, "priority": 50, "is_active": True}),
+            client.post("/rules/suggestions/apply", json={**missing, "merchant": "x"}),
+        ]
+        assert {(r.status_code, r.json()["detail"]) for r in errors} == {
+            (422, "Category id=1000000 does not exist.")
+        }
+        assert client.delete(f"/rules/{rule_id}").status_code == 204
+        assert db.query(Transaction).filter(Transaction.category_rule_id == rule_id).count() == 0
+
+    def test_categories(self, client, db):
+        assert client.get("/categories/").status_code == 200
+        cat = db.query(Category).filter(Category.name == "Groceries").one()
+        assert client.delete(f"/categories/{cat.id}").status_code == 204
+        assert db.query(Rule).filter(Rule.category_id == cat.id).count() == 0
+        assert db.query(Transaction).filter(Transaction.category_id == cat.id).count() == 0